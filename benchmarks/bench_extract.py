@@ -0,0 +1,71 @@
+"""
+Benchmark of the get_* extractors.
+
+Runs all five extractors of Instrument over a number of instruments built from
+the snapshots in test/assets (half stocks, half funds), once calling the
+compiled extractors directly and once through the memoizing get_* methods.
+
+Usage:
+    python benchmarks/bench_extract.py [number of snapshots, default 10000]
+"""
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from src.pyonvista.api import EXTRACTORS, EXTRACTION_STATS, Instrument
+
+METHODS = (
+    Instrument.get_financial_ratios,
+    Instrument.get_performance_metrics,
+    Instrument.get_technical_indicators,
+    Instrument.get_company_info,
+    Instrument.get_sustainability_data,
+)
+
+
+def instruments(count: int):
+    snapshots = []
+    for name in ("snapshot_DE0007664039.json", "snapshot_IE00B42NKQ00.json"):
+        with open(os.path.join(ROOT, "test", "assets", name)) as f:
+            snapshots.append(f.read())
+    # every instrument gets its own copy of the snapshot
+    return [Instrument.from_snapshot(json.loads(snapshots[i % 2])) for i in range(count)]
+
+
+def best_of(runs: int, function) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(count: int):
+    population = instruments(count)
+    extractors = list(EXTRACTORS.values())
+
+    def extract():
+        for instrument in population:
+            for extractor in extractors:
+                extractor(instrument.dict)
+
+    def methods():
+        for instrument in population:
+            for method in METHODS:
+                method(instrument)
+
+    for name, function in (("extraction", extract), ("get_* (memoized)", methods)):
+        seconds = best_of(5, function)
+        print(f"{name:<18}{count} snapshots x {len(METHODS)}: {seconds * 1e3:.1f} ms, "
+              f"{seconds / count / len(METHODS) * 1e6:.2f} us per call")
+    hits = sum(stats.hits for stats in EXTRACTION_STATS.values())
+    misses = sum(stats.misses for stats in EXTRACTION_STATS.values())
+    print(f"memo hits {hits}, misses {misses}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,55 @@
+"""
+Benchmark of the json decoders for large snapshot payloads.
+
+Compares the former decoding path (stdlib json followed by a dict copy) with
+the decoders available through pyonvista.decoder and, with msgspec installed,
+the typed snapshot schema of pyonvista.schema. The sample payload is the
+snapshot in test/assets inflated to the size of a snapshot with long
+fundamental histories and many notations.
+
+Usage:
+    python benchmarks/bench_json_decode.py [inflation factor, default 50]
+"""
+import json
+import os
+import sys
+import timeit
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from src.pyonvista import schema
+from src.pyonvista.decoder import DECODERS
+
+
+def sample_payload(factor: int) -> bytes:
+    with open(os.path.join(ROOT, "test", "assets", "snapshot_DE0007664039.json")) as f:
+        snapshot = json.load(f)
+    for section in ("stocksCnFundamentalList", "stocksCnFinancialList", "stocksBalanceSheetList",
+                    "stocksCnEstimatesList", "quoteList"):
+        snapshot[section]["list"] = snapshot[section]["list"] * factor
+    return json.dumps(snapshot).encode()
+
+
+def main(factor: int):
+    payload = sample_payload(factor)
+    number = max(10, 20_000_000 // len(payload))
+    print(f"payload {len(payload) / 1024:.0f} KiB, {number} runs")
+
+    def legacy():
+        return dict(json.loads(payload))
+
+    candidates = {"json + dict copy (legacy)": legacy}
+    candidates.update({name: (lambda decode=decode: decode(payload)) for name, decode in DECODERS.items()})
+    if schema.msgspec is not None:
+        candidates["msgspec schema (typed)"] = lambda: schema.decode_snapshot(payload)
+        retained = len(json.dumps(schema.decode_snapshot(payload)))
+        print(f"typed snapshot keeps {retained / 1024:.0f} KiB of {len(payload) / 1024:.0f} KiB")
+    baseline = None
+    for name, run in candidates.items():
+        seconds = min(timeit.repeat(run, number=number, repeat=3)) / number
+        baseline = baseline or seconds
+        print(f"{name:<28}{seconds * 1e6:>10.0f} us{baseline / seconds:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,68 @@
+"""
+Memory benchmark of quote layouts.
+
+Compares the former dict based Quote dataclass holding a strong instrument
+reference with the slotted Quote and the columnar QuoteSeries.
+
+Usage:
+    python benchmarks/bench_quote_memory.py [number of quotes, default 1000000]
+"""
+import dataclasses
+import datetime
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from src.pyonvista.api import Instrument, Quote
+from src.pyonvista.series import QuoteSeries
+
+
+@dataclasses.dataclass
+class LegacyQuote:
+    resolution: str
+    timestamp: datetime
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: int
+    pieces: int
+    instrument: "Instrument"
+
+
+def bars(count: int):
+    start = datetime.datetime(2024, 1, 1).timestamp()
+    for i in range(count):
+        price = 100.0 + i % 1000 / 100
+        yield start + 60 * i, price, price + 0.1, price - 0.1, price + 0.05, float(i % 997), float(i % 13)
+
+
+def build_quotes(cls, instrument, count):
+    return [
+        cls("1m", datetime.datetime.fromtimestamp(stamp), first, high, low, last, int(volume), int(pieces), instrument)
+        for stamp, first, high, low, last, volume, pieces in bars(count)
+    ]
+
+
+def measure(name: str, build) -> int:
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    print(f"{name:<28}{size / 1024 / 1024:>10.1f} MiB")
+    return size
+
+
+def main(count: int):
+    instrument = Instrument(name="Benchmark", isin="DE0000000000")
+    print(f"{count:,} quotes")
+    legacy = measure("dataclass Quote (legacy)", lambda: build_quotes(LegacyQuote, instrument, count))
+    slotted = measure("slotted Quote", lambda: build_quotes(Quote, instrument, count))
+    series = measure("QuoteSeries", lambda: QuoteSeries("1m", instrument, bars=bars(count)))
+    print(f"slotted saves {1 - slotted / legacy:.0%}, QuoteSeries saves {1 - series / legacy:.0%}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
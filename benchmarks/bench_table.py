@@ -0,0 +1,64 @@
+"""
+Benchmark of building a screening table for a universe of instruments.
+
+Compares collecting the get_* dataclasses row by row into records with the
+single pass FundamentalsTable, both with and without conversion to pandas.
+
+Usage:
+    python benchmarks/bench_table.py [number of instruments, default 5000]
+"""
+import dataclasses
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from src.pyonvista.api import Instrument
+from src.pyonvista.table import FundamentalsTable, pandas
+
+
+def instruments(count: int):
+    snapshots = []
+    for name in ("snapshot_DE0007664039.json", "snapshot_IE00B42NKQ00.json"):
+        with open(os.path.join(ROOT, "test", "assets", name)) as f:
+            snapshots.append(f.read())
+    return [Instrument.from_snapshot(json.loads(snapshots[i % 2])) for i in range(count)]
+
+
+def records(population):
+    rows = []
+    for instrument in population:
+        row = {"isin": instrument.isin, "symbol": instrument.symbol, "name": instrument.name}
+        for result in (instrument.get_financial_ratios(), instrument.get_performance_metrics(),
+                       instrument.get_technical_indicators(), instrument.get_company_info(),
+                       instrument.get_sustainability_data()):
+            row.update(dataclasses.asdict(result))
+        rows.append(row)
+    return rows
+
+
+def timed(function) -> float:
+    started = time.perf_counter()
+    function()
+    return time.perf_counter() - started
+
+
+def main(count: int):
+    candidates = {
+        "records (row by row)": lambda population: records(population),
+        "FundamentalsTable": lambda population: FundamentalsTable.from_instruments(population),
+    }
+    if pandas is not None:
+        candidates["records -> DataFrame"] = lambda population: pandas.DataFrame.from_records(records(population))
+        candidates["FundamentalsTable -> DataFrame"] = \
+            lambda population: FundamentalsTable.from_instruments(population).to_pandas()
+    for name, build in candidates.items():
+        # fresh instruments, so that no extraction is memoized yet
+        best = min(timed(lambda: build(population)) for population in (instruments(count) for _ in range(3)))
+        print(f"{name:<32}{best * 1e3:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -1,6 +1,13 @@
-from .api import Instrument, PyOnVista, Notation, Quote, Market
+from .api import Instrument, PyOnVista, Notation, Quote, Market, BatchResult
+from .transport import RateLimiter, TokenBucket
+from .cache import CacheBackend, SnapshotCache, SQLiteCache, SearchCache
+from .history import QuoteHistoryCache
+from .series import QuoteSeries
+from .table import FundamentalsTable
+from .index import InstrumentIndex
+from .poller import QuotePoller
 
-__all__ = [Instrument, PyOnVista, Notation, Quote, Market]
+__all__ = [Instrument, PyOnVista, Notation, Quote, QuoteSeries, Market, BatchResult, RateLimiter, TokenBucket, CacheBackend, SnapshotCache, SQLiteCache, SearchCache, QuoteHistoryCache, FundamentalsTable, InstrumentIndex, QuotePoller]
 
 __version__ = '0.8.4'
 __author__ = 'Simon Bauer'
\ No newline at end of file
@@ -7,11 +7,13 @@ The API provides extensive financial data including:
 - Advanced filtering and error handling
 """
 import asyncio
+import collections
+import copy
 import inspect
+import time
 import weakref
 import dataclasses
 import datetime
-import json as jsonlib
 import logging
 from typing import (
     Literal,
@@ -19,12 +21,25 @@ from typing import (
     Optional,
     Union,
     Dict,
-    List
+    List,
+    Iterable,
+    AsyncIterator,
+    Deque,
+    MutableMapping,
+    Tuple
 )
-from types import SimpleNamespace
 
 import aiohttp
-from .util import make_url
+from .util import make_url, deep_sizeof
+from .cache import CacheBackend, CacheStats, SearchCache
+from . import schema
+from .decoder import Decoder, get_decoder
+from .fields import Field, compile_extractor, field_paths, project, safe_float, safe_int
+from .index import InstrumentIndex
+from .history import QuoteHistoryCache, ChunkTiming, CHUNK_DAYS, iter_bars, merge_bars, split_range
+from .series import QuoteSeries
+from .tree import TreeView
+from .transport import Transport, RateLimiter, TokenBucket, create_connector, create_session
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -37,6 +52,9 @@ snapshot_map = {
     "STOCK": "stocks",
 }
 
+# bars of past days do not change anymore
+HISTORIC_CHART_TTL = 30 * 24 * 3600
+
 
 # Financial Data Classes for pyOnvista v2.0
 @dataclasses.dataclass
@@ -114,8 +132,74 @@ class SustainabilityData:
     sustainability_rank: Optional[int] = None
 
 
+# Where the fields of the get_* dataclasses are found in a snapshot.
+# Lists are ordered by year, the first item is the most recent one.
+FIELD_MAP: Dict[type, Tuple[Field, ...]] = {
+    FinancialRatios: (
+        Field("market_cap", "stocksFigure.marketCapInstrument", safe_float),
+        Field("pe_ratio", "stocksCnFundamentalList.list.0.cnPer", safe_float),
+        Field("pb_ratio", "stocksCnFundamentalList.list.0.cnPriceBookvalue", safe_float),
+        Field("eps", "stocksCnFundamentalList.list.0.cnEpsAdj", safe_float,
+              fallback="stocksBalanceSheetList.list.0.eps"),
+        Field("dividend_yield", "stocksCnFundamentalList.list.0.cnDivYield", safe_float),
+        Field("return_on_equity", "stocksCnFinancialList.list.0.cnReturnEquity", safe_float),
+        Field("debt_to_equity", "stocksCnFinancialList.list.0.cnDebtEquity", safe_float),
+    ),
+    PerformanceMetrics: (
+        Field("performance_1d", "cnPerformance.performanceRelD1", safe_float,
+              fallback="quote.performancePct"),
+        Field("performance_1w", "cnPerformance.performanceRelW1", safe_float),
+        Field("performance_1m", "cnPerformance.performanceRelM1", safe_float),
+        Field("performance_3m", "cnPerformance.performanceRelM3", safe_float),
+        Field("performance_1y", "cnPerformance.performanceRelW52", safe_float,
+              fallback="quote.performance1YearPct"),
+        Field("performance_3y", "cnPerformance.performanceRelY3", safe_float),
+        Field("volatility_30d", "cnPerformance.vola30", safe_float),
+        Field("volatility_250d", "cnPerformance.vola250", safe_float),
+    ),
+    TechnicalIndicators: (
+        Field("moving_avg_5d", "stocksCnTechnical.movingAverage5", safe_float),
+        Field("moving_avg_20d", "stocksCnTechnical.movingAverage20", safe_float),
+        Field("moving_avg_30d", "stocksCnTechnical.movingAverage30", safe_float),
+        Field("moving_avg_100d", "stocksCnTechnical.movingAverage100", safe_float),
+        Field("moving_avg_200d", "stocksCnTechnical.movingAverage200", safe_float),
+        Field("rsi_14d", "stocksCnTechnical.relativeStrengthIndexWilder20", safe_float),
+    ),
+    CompanyInfo: (
+        Field("country", "company.isoCountry"),
+        Field("headquarters", "company.nameCountry"),
+        Field("industry", "company.branch.name"),
+        Field("sector", "company.branch.sector.name"),
+        Field("employees", "stocksBalanceSheetList.list.0.employees", safe_int),
+    ),
+    SustainabilityData: (
+        Field("esg_score", "sustainabilityData.totalScore", safe_float),
+        Field("environmental_score", "sustainabilityData.climateGroup.climateScore", safe_float),
+        Field("renewable_energy_usage", "sustainabilityData.climateGroup.renewableEnergyValue", safe_float),
+        Field("social_score", "sustainabilityData.societyGroup.societyScore", safe_float),
+        Field("governance_score", "sustainabilityData.genderGroup.genderScore", safe_float),
+    ),
+}
+
+EXTRACTORS = {cls: compile_extractor(cls, fields) for cls, fields in FIELD_MAP.items()}
+
+# hits and misses of the results memoized by the get_* methods of all instruments,
+# expirations count results dropped because a new snapshot was installed
+EXTRACTION_STATS: Dict[type, CacheStats] = {cls: CacheStats() for cls in FIELD_MAP}
+
+# what an instrument keeps of a requested snapshot, see PyOnVista(retention=...)
+RETENTION_POLICIES = ("all", "extractors", "none")
+# paths of the snapshot read by the get_* methods
+EXTRACTOR_PATHS = field_paths(FIELD_MAP.values())
+
+
 @dataclasses.dataclass
 class Quote:
+    """
+    A single bar or the current quote of an instrument.
+    Quotes are slotted, so long lists of quotes need less memory.
+    """
+    __slots__ = ("resolution", "timestamp", "open", "high", "low", "close", "volume", "pieces", "instrument")
     resolution: str
     timestamp: datetime
     open: float
@@ -126,6 +210,12 @@ class Quote:
     pieces: int
     instrument: "Instrument"
 
+    def __eq__(self, other):
+        # the instrument is not compared, it refers back to its quote
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__[:-1])
+
     @classmethod
     def from_dict(cls, instrument: "Instrument", quote:dict) -> "Quote":
         try:
@@ -153,15 +243,36 @@ class Quote:
         return quote
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(frozen=True)
 class Market:
     """Maps ID,market,exchange whereas exchange is acronym/key for market"""
+    __slots__ = ("name", "code")
     name: str
     code: str
 
+    @classmethod
+    def intern(cls, name: str, code: str) -> "Market":
+        """
+        Returns the shared Market instance for name and code.
+        The same exchanges appear in the notations of every instrument.
+        """
+        key = (name, code)
+        market = _markets.get(key)
+        if market is None:
+            market = _markets[key] = cls(name, code)
+        return market
+
+    def __reduce__(self):
+        # frozen and slotted, unpickle through intern instead of setting attributes
+        return Market.intern, (self.name, self.code)
+
+
+_markets: Dict[tuple, Market] = {}
+
 
 @dataclasses.dataclass
 class Notation:
+    __slots__ = ("market", "id")
     market: Market
     id: str
 
@@ -183,28 +294,62 @@ class Instrument:
     snapshot_valid_until: datetime.datetime = dataclasses.field(default_factory=datetime.datetime.now, repr=False)
     notations: List[Notation] = dataclasses.field(default_factory=list)
     last_change: datetime.datetime = dataclasses.field(default_factory=datetime.datetime.now, repr=False)
+    # results of the get_* methods for the snapshot in _extracted_from
+    _extracted: dict = dataclasses.field(repr=False, compare=False, default_factory=dict)
+    _extracted_from: Optional[dict] = dataclasses.field(repr=False, compare=False, default=None)
+    _tree: Optional[TreeView] = dataclasses.field(repr=False, compare=False, default=None)
 
     @property
     def dict(self) -> dict:
         return self._snapshot_json
 
     @property
-    def as_tree(self) -> SimpleNamespace:
+    def retained_bytes(self) -> int:
+        """Bytes held by the snapshot and the memoized get_* results of this instrument"""
+        return deep_sizeof((self._snapshot_json, self._extracted))
+
+    @property
+    def as_tree(self) -> TreeView:
         """
-        Provides a simple object tree of json for easy browsing
+        Provides a simple object tree of json for easy browsing.
+        The tree is a read-only view of the snapshot, kept until a new snapshot is installed.
         """
-        return jsonlib.loads(jsonlib.dumps(self._snapshot_json), object_hook=lambda d: SimpleNamespace(**d))
+        if self._tree is None or self._tree._data is not self._snapshot_json:
+            self._tree = TreeView(self._snapshot_json)
+        return self._tree
 
     @classmethod
-    def from_json(cls, data: dict) -> "Instrument":
+    def from_json(cls, data: dict,
+                  identity_map: Optional[MutableMapping[str, "Instrument"]] = None) -> "Instrument":
         """
         Alternate constructor to parse data to a fresh instrument instance.
+        With an identity map, the instrument of the same isin or uid found in
+        the map is updated and returned instead, a fresh one is added to it.
         :param data: a json dict from a web response
+        :param identity_map: instruments by isin and uid, e.g. a weakref.WeakValueDictionary
         :return: Instrument
         """
+        if identity_map is not None:
+            instrument = _lookup_identity(identity_map, data.get("isin"), data.get("entityValue"))
+            if instrument is not None:
+                return _update_instrument(instrument, data)
         instrument = cls()
         instrument.notations = []
         _update_instrument(instrument, data)
+        if identity_map is not None:
+            _register_identity(identity_map, instrument)
+        return instrument
+
+    @classmethod
+    def from_snapshot(cls, data: dict) -> "Instrument":
+        """
+        Alternate constructor to parse a snapshot response, e.g. read from a cache.
+        :param data: a snapshot json dict as returned by the snapshot endpoint
+        :return: Instrument
+        """
+        instrument = cls()
+        instrument.notations = []
+        _apply_snapshot(instrument, data)
         return instrument
 
     @classmethod
@@ -213,6 +358,26 @@ class Instrument:
         raise NotImplementedError("Constructor not implemented yet")
 
     # PyOnvista v2.0 - Financial Data Extraction Methods
+    # The fields are looked up as described in FIELD_MAP. Results are memoized
+    # until a new snapshot is installed, callers receive a copy unless shared is set.
+    def _extract(self, cls: type, shared: bool = False) -> Any:
+        snapshot = self._snapshot_json
+        if self._extracted_from is not snapshot:
+            for dropped in self._extracted:
+                EXTRACTION_STATS[dropped].expirations += 1
+            # a new dict rather than clear(), copies of the instrument may share the old one
+            self._extracted = {}
+            self._extracted_from = snapshot
+        stats = EXTRACTION_STATS[cls]
+        result = self._extracted.get(cls)
+        if result is None:
+            stats.misses += 1
+            result = self._extracted[cls] = EXTRACTORS[cls](snapshot)
+        else:
+            stats.hits += 1
+        # the fields are immutable, a shallow copy keeps the memoized result intact
+        return result if shared else copy.copy(result)
+
     def get_financial_ratios(self) -> FinancialRatios:
         """
         Extract financial ratios from snapshot data.
@@ -220,51 +385,7 @@ class Instrument:
         Returns:
             FinancialRatios object with available financial metrics
         """
-        if not self._snapshot_json:
-            return FinancialRatios()
-        
-        data = self._snapshot_json
-        ratios = FinancialRatios()
-        
-        try:
-            # Extract market cap from stocksFigure section
-            if 'stocksFigure' in data:
-                figure_data = data['stocksFigure']
-                ratios.market_cap = self._safe_float(figure_data.get('marketCapInstrument'))
-            
-            # Extract financial ratios from stocksCnFundamentalList
-            if 'stocksCnFundamentalList' in data and 'list' in data['stocksCnFundamentalList']:
-                fund_list = data['stocksCnFundamentalList']['list']
-                # Use most recent year data (first item is usually most recent)
-                if fund_list:
-                    recent_data = fund_list[0]  # Most recent year
-                    ratios.pe_ratio = self._safe_float(recent_data.get('cnPer'))
-                    ratios.pb_ratio = self._safe_float(recent_data.get('cnPriceBookvalue'))
-                    ratios.eps = self._safe_float(recent_data.get('cnEpsAdj'))
-                    ratios.dividend_yield = self._safe_float(recent_data.get('cnDivYield'))
-            
-            # Extract from stocksCnFinancialList
-            if 'stocksCnFinancialList' in data and 'list' in data['stocksCnFinancialList']:
-                fin_list = data['stocksCnFinancialList']['list']
-                if fin_list:
-                    recent_data = fin_list[0]  # Most recent year
-                    if not ratios.return_on_equity:
-                        ratios.return_on_equity = self._safe_float(recent_data.get('cnReturnEquity'))
-                    if not ratios.debt_to_equity:
-                        ratios.debt_to_equity = self._safe_float(recent_data.get('cnDebtEquity'))
-            
-            # Extract from stocksBalanceSheetList for additional metrics
-            if 'stocksBalanceSheetList' in data and 'list' in data['stocksBalanceSheetList']:
-                balance_list = data['stocksBalanceSheetList']['list']
-                if balance_list:
-                    recent_data = balance_list[0]  # Most recent year
-                    if not ratios.eps:
-                        ratios.eps = self._safe_float(recent_data.get('eps'))
-                        
-        except Exception as e:
-            logger.debug(f"Error extracting financial ratios: {str(e)}")
-            
-        return ratios
+        return self._extract(FinancialRatios)
 
     def get_performance_metrics(self) -> PerformanceMetrics:
         """
@@ -273,39 +394,7 @@ class Instrument:
         Returns:
             PerformanceMetrics object with available performance data
         """
-        if not self._snapshot_json:
-            return PerformanceMetrics()
-            
-        data = self._snapshot_json
-        metrics = PerformanceMetrics()
-        
-        try:
-            # Extract from cnPerformance section
-            if 'cnPerformance' in data:
-                perf_data = data['cnPerformance']
-                metrics.performance_1d = self._safe_float(perf_data.get('performanceRelD1'))
-                metrics.performance_1w = self._safe_float(perf_data.get('performanceRelW1'))
-                metrics.performance_1m = self._safe_float(perf_data.get('performanceRelM1'))
-                metrics.performance_3m = self._safe_float(perf_data.get('performanceRelM3'))
-                metrics.performance_1y = self._safe_float(perf_data.get('performanceRelW52'))
-                metrics.performance_3y = self._safe_float(perf_data.get('performanceRelY3'))
-                
-                # Volatility data
-                metrics.volatility_30d = self._safe_float(perf_data.get('vola30'))
-                metrics.volatility_250d = self._safe_float(perf_data.get('vola250'))
-            
-            # Extract basic performance from quote section
-            if 'quote' in data:
-                quote_data = data['quote']
-                if not metrics.performance_1d:
-                    metrics.performance_1d = self._safe_float(quote_data.get('performancePct'))
-                if not metrics.performance_1y:
-                    metrics.performance_1y = self._safe_float(quote_data.get('performance1YearPct'))
-                    
-        except Exception as e:
-            logger.debug(f"Error extracting performance metrics: {str(e)}")
-            
-        return metrics
+        return self._extract(PerformanceMetrics)
 
     def get_technical_indicators(self) -> TechnicalIndicators:
         """
@@ -314,33 +403,7 @@ class Instrument:
         Returns:
             TechnicalIndicators object with available technical data
         """
-        if not self._snapshot_json:
-            return TechnicalIndicators()
-            
-        data = self._snapshot_json
-        indicators = TechnicalIndicators()
-        
-        try:
-            # Extract from stocksCnTechnical section
-            if 'stocksCnTechnical' in data:
-                tech_data = data['stocksCnTechnical']
-                indicators.moving_avg_5d = self._safe_float(tech_data.get('movingAverage5'))
-                indicators.moving_avg_20d = self._safe_float(tech_data.get('movingAverage20'))
-                indicators.moving_avg_30d = self._safe_float(tech_data.get('movingAverage30'))
-                indicators.moving_avg_100d = self._safe_float(tech_data.get('movingAverage100'))
-                indicators.moving_avg_200d = self._safe_float(tech_data.get('movingAverage200'))
-                
-                # RSI (Relative Strength Index)
-                indicators.rsi_14d = self._safe_float(tech_data.get('relativeStrengthIndexWilder20'))
-                
-                # Other technical indicators from the API
-                # Note: API uses different field names than traditional technical analysis
-                # momentum and relative strength can be used as approximations
-                        
-        except Exception as e:
-            logger.debug(f"Error extracting technical indicators: {str(e)}")
-            
-        return indicators
+        return self._extract(TechnicalIndicators)
 
     def get_company_info(self) -> CompanyInfo:
         """
@@ -349,37 +412,7 @@ class Instrument:
         Returns:
             CompanyInfo object with available company data
         """
-        if not self._snapshot_json:
-            return CompanyInfo()
-            
-        data = self._snapshot_json
-        info = CompanyInfo()
-        
-        try:
-            # Extract from company section
-            if 'company' in data:
-                comp_data = data['company']
-                info.country = comp_data.get('isoCountry')
-                info.headquarters = comp_data.get('nameCountry')
-                
-                # Extract sector/industry from branch
-                if 'branch' in comp_data:
-                    branch_data = comp_data['branch']
-                    info.industry = branch_data.get('name')
-                    if 'sector' in branch_data:
-                        info.sector = branch_data['sector'].get('name')
-            
-            # Extract employee count from balance sheet
-            if 'stocksBalanceSheetList' in data and 'list' in data['stocksBalanceSheetList']:
-                balance_list = data['stocksBalanceSheetList']['list']
-                if balance_list:
-                    recent_data = balance_list[0]  # Most recent year
-                    info.employees = self._safe_int(recent_data.get('employees'))
-                    
-        except Exception as e:
-            logger.debug(f"Error extracting company info: {str(e)}")
-            
-        return info
+        return self._extract(CompanyInfo)
 
     def get_sustainability_data(self) -> SustainabilityData:
         """
@@ -388,56 +421,54 @@ class Instrument:
         Returns:
             SustainabilityData object with available ESG metrics
         """
-        if not self._snapshot_json:
-            return SustainabilityData()
-            
-        data = self._snapshot_json
-        sustainability = SustainabilityData()
-        
-        try:
-            # Extract from sustainabilityData section
-            if 'sustainabilityData' in data:
-                sust_data = data['sustainabilityData']
-                sustainability.esg_score = self._safe_float(sust_data.get('totalScore'))
-                
-                # Climate group data
-                if 'climateGroup' in sust_data:
-                    climate_data = sust_data['climateGroup']
-                    sustainability.environmental_score = self._safe_float(climate_data.get('climateScore'))
-                    sustainability.renewable_energy_usage = self._safe_float(climate_data.get('renewableEnergyValue'))
-                
-                # Society group data
-                if 'societyGroup' in sust_data:
-                    society_data = sust_data['societyGroup']
-                    sustainability.social_score = self._safe_float(society_data.get('societyScore'))
-                
-                # Gender group data
-                if 'genderGroup' in sust_data:
-                    gender_data = sust_data['genderGroup']
-                    sustainability.governance_score = self._safe_float(gender_data.get('genderScore'))
-                    
-        except Exception as e:
-            logger.debug(f"Error extracting sustainability data: {str(e)}")
-            
-        return sustainability
+        return self._extract(SustainabilityData)
 
     def _safe_float(self, value) -> Optional[float]:
         """Safely convert value to float, return None if not possible."""
-        if value is None or value == '':
-            return None
-        try:
-            return float(value)
-        except (ValueError, TypeError):
-            return None
+        return safe_float(value)
     
     def _safe_int(self, value) -> Optional[int]:
         """Safely convert value to int, return None if not possible."""
-        if value is None or value == '':
-            return None
-        try:
-            return int(value)
-        except (ValueError, TypeError):
-            return None
+        return safe_int(value)
+
+@dataclasses.dataclass
+class BatchResult:
+    """Outcome of a single item of PyOnVista.request_instruments"""
+    isin: str
+    instrument: Optional[Instrument] = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _lookup_identity(identity_map: MutableMapping[str, Instrument],
+                     isin: Optional[str], uid: Optional[str]) -> Optional[Instrument]:
+    """
+    Finds the instrument of isin or uid in an identity map
+    :param identity_map: instruments by isin and uid
+    :param isin: isin or None
+    :param uid: onvista entity value or None
+    :return: Instrument or None
+    """
+    for key in (isin.upper() if isin else None, uid):
+        if key:
+            instrument = identity_map.get(key)
+            if instrument is not None:
+                return instrument
+    return None
+
+
+def _register_identity(identity_map: MutableMapping[str, Instrument], instrument: Instrument):
+    """
+    Adds instrument to an identity map under its isin and uid, unless these are taken
+    :param identity_map: instruments by isin and uid
+    :param instrument: Instrument
+    """
+    for key in (instrument.isin.upper() if instrument.isin else None, instrument.uid):
+        if key:
+            identity_map.setdefault(key, instrument)
 
 
 def _update_instrument(instrument: Instrument, data: dict, quote: dict = None, full_snapshot: dict = None):
@@ -469,6 +500,95 @@ def _update_instrument(instrument: Instrument, data: dict, quote: dict = None, f
     return instrument
 
 
+def _apply_snapshot(instrument: Instrument, data: dict):
+    """
+    Updates instrument from a complete snapshot response
+    :param instrument: Instrument to update
+    :param data: snapshot json dict
+    :return: updated instrument
+    """
+    # Update instrument with full snapshot data for v2.0 features
+    _update_instrument(
+        instrument,
+        data["instrument"],
+        data.get("quote"),
+        full_snapshot=data  # Store complete snapshot for fundamental data extraction
+    )
+
+    # Add market notations
+    if "quoteList" in data and "list" in data["quoteList"]:
+        _add_notation(instrument, notations=data["quoteList"]["list"])
+    return instrument
+
+
+def _retain(instrument: Instrument, retention: str):
+    """
+    Applies a retention policy to the snapshot installed on instrument
+    :param instrument: Instrument with a freshly installed snapshot
+    :param retention: one of RETENTION_POLICIES
+    :return: instrument
+    """
+    if retention == "extractors":
+        # a pruned copy, the installed snapshot may be shared with a cache
+        instrument._snapshot_json = project(instrument._snapshot_json, EXTRACTOR_PATHS)
+    elif retention == "none":
+        for cls in EXTRACTORS:
+            instrument._extract(cls, shared=True)
+        # keep the memoized results valid for the emptied snapshot
+        instrument._snapshot_json = instrument._extracted_from = {}
+    return instrument
+
+
+def _search_match(entry: dict, instrument_type: Optional[str], country: Optional[str]) -> bool:
+    """
+    Whether a search result passes the type and country filters of search_instrument
+    :param entry: instrument dict of a search response
+    :param instrument_type: type as in the entityType field, None for any
+    :param country: country code the isin starts with, None for any
+    :return: bool
+    """
+    if instrument_type and entry.get("entityType") != instrument_type.upper():
+        return False
+    if country and (entry.get("isin") or "")[:2] != country.upper():
+        return False
+    return True
+
+
+def _facet_complete(facet: dict, per_type: int) -> bool:
+    """
+    Whether a facet of a search response holds all results of its type
+    :param facet: facet of a search response
+    :param per_type: perType of the request
+    :return: bool
+    """
+    results = facet.get("results") or ()
+    total = facet.get("total")
+    if total is not None:
+        return total <= len(results)
+    return len(results) < per_type
+
+
+def _from_search_results(entries: Iterable[dict], limit: int,
+                         identity_map: Optional[MutableMapping[str, Instrument]] = None) -> List[Instrument]:
+    """
+    Constructs instruments of up to limit search results, skipping unparsable ones
+    :param entries: instrument dicts of search responses
+    :param limit: maximum number of instruments
+    :param identity_map: see Instrument.from_json
+    :return: list of instruments
+    """
+    results = []
+    for data in entries:
+        try:
+            results.append(Instrument.from_json(data, identity_map))
+        except Exception as e:
+            logger.warning(f"Error parsing instrument data: {str(e)}")
+            continue
+        if len(results) == limit:
+            break
+    return results
+
+
 def _add_notation(instrument: Instrument, notations: dict):
     """
     Ads notation to provided instrument
@@ -476,27 +596,164 @@ def _add_notation(instrument: Instrument, notations: dict):
     :param notations:
     :return:
     """
+    known = {notation.id for notation in instrument.notations}
     for notation in notations:
-        market = Market(name=notation["market"]["name"], code=notation["market"]["codeExchange"])
+        if notation["market"]["idNotation"] in known:
+            # already added by an earlier request
+            continue
+        market = Market.intern(name=notation["market"]["name"], code=notation["market"]["codeExchange"])
         notation = Notation(market=market, id=notation["market"]["idNotation"])
         instrument.notations.append(notation)
 
 
 class PyOnVista:
-    def __init__(self, request_delay: float = 0.1, timeout: int = 30):
+    def __init__(self, request_delay: float = 0.1, timeout: int = 30, max_in_flight: int = 10,
+                 api_base: str = ONVISTA_API_BASE,
+                 rate_limiter: Optional[Union[RateLimiter, TokenBucket]] = None,
+                 snapshot_cache: Optional[CacheBackend] = None,
+                 chart_cache: Optional[CacheBackend] = None,
+                 chart_cache_ttl: float = 60.0,
+                 quote_cache: Optional[QuoteHistoryCache] = None,
+                 chunk_days: Optional[Dict[str, int]] = None,
+                 decoder: Union[str, Decoder, None] = None,
+                 typed_snapshots: bool = False,
+                 retention: Literal["all", "extractors", "none"] = "all",
+                 index: Optional[InstrumentIndex] = None,
+                 search_cache: Optional[SearchCache] = None):
         """
         Initialize PyOnvista API client.
         
         Args:
             request_delay: Delay between requests to avoid rate limiting (default: 0.1s)
             timeout: Request timeout in seconds (default: 30s)
+            max_in_flight: Maximum number of concurrent requests (default: 10)
+            api_base: Base url of the onvista api (default: ONVISTA_API_BASE)
+            rate_limiter: Limiter, e.g. a TokenBucket shared by several clients.
+                Overrides request_delay (default: RateLimiter(request_delay))
+            snapshot_cache: Cache serving request_instrument until a snapshot
+                expires, e.g. SnapshotCache or SQLiteCache (default: no caching)
+            chart_cache: Cache for chart_history responses (default: no caching)
+            chart_cache_ttl: Seconds a chart_history response reaching into the
+                current day is cached. Responses covering past days only are
+                cached for HISTORIC_CHART_TTL (default: 60s)
+            quote_cache: Cache of downloaded bars, request_quotes then only
+                requests days not downloaded before (default: no caching)
+            chunk_days: Days per chart_history request by resolution. Longer
+                windows are split and requested concurrently (default: CHUNK_DAYS)
+            decoder: JSON decoder, "orjson", "msgspec", "json" or a callable
+                taking bytes (default: fastest installed)
+            typed_snapshots: Decode snapshots with the msgspec schema in
+                schema.py, keeping only the fields the get_* methods read.
+                Reduces memory, not decoding time. Requires msgspec (default: False)
+            retention: What request_instrument keeps of a snapshot on the
+                instrument: "all", "extractors" (only the fields read by the
+                get_* methods) or "none" (the get_* results are extracted
+                up front, dict and as_tree are empty) (default: "all")
+            index: Local index filled from search and snapshot responses.
+                Searches for an isin, wkn or symbol it knows are not sent to
+                the api (default: none)
+            search_cache: Cache of search_instrument results, also answering
+                longer terms from complete results of a shorter one
+                (default: no caching)
         """
+        if retention not in RETENTION_POLICIES:
+            raise ValueError(f"retention must be one of {RETENTION_POLICIES}")
+        if typed_snapshots and schema.msgspec is None:
+            raise ImportError("typed_snapshots requires msgspec to be installed")
         self._client: Optional[aiohttp.ClientSession] = None
         self._loop: Optional[asyncio.BaseEventLoop] = None
-        self._instruments = weakref.WeakSet()
+        # one live instrument per isin and uid, see Instrument.from_json
+        self._instruments: MutableMapping[str, Instrument] = weakref.WeakValueDictionary()
         self._request_delay = request_delay
         self._timeout = timeout
-        self._last_request_time = 0.0
+        self._max_in_flight = max_in_flight
+        self._decoder = get_decoder(decoder)
+        self._snapshot_decoder: Optional[Decoder] = schema.decode_snapshot if typed_snapshots else None
+        self._retention = retention
+        self._index = index
+        self._search_cache = search_cache
+        self._api_base = api_base
+        self._rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter(request_delay)
+        self._transport: Optional[Transport] = None
+        self._owns_client = False
+        self._snapshot_cache = snapshot_cache
+        self._chart_cache = chart_cache
+        self._chart_cache_ttl = chart_cache_ttl
+        self._quote_cache = quote_cache
+        self.chunk_days = {**CHUNK_DAYS, **(chunk_days or {})}
+        self.chunk_timings: Deque[ChunkTiming] = collections.deque(maxlen=1000)
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._coalesced_requests = 0
+
+    @property
+    def snapshot_cache(self) -> Optional[CacheBackend]:
+        return self._snapshot_cache
+
+    @property
+    def chart_cache(self) -> Optional[CacheBackend]:
+        return self._chart_cache
+
+    @property
+    def quote_cache(self) -> Optional[QuoteHistoryCache]:
+        return self._quote_cache
+
+    @property
+    def retention(self) -> str:
+        return self._retention
+
+    @property
+    def index(self) -> Optional[InstrumentIndex]:
+        return self._index
+
+    @property
+    def search_cache(self) -> Optional[SearchCache]:
+        return self._search_cache
+
+    def cache_stats(self) -> Dict[str, CacheStats]:
+        """
+        Counters of the caches the api is configured with.
+
+        Returns:
+            Dict of CacheStats by cache: "snapshot", "chart", "search" and
+            "index" for those configured, e.g. stats["search"].hit_ratio
+        """
+        caches = {
+            "snapshot": self._snapshot_cache,
+            "chart": self._chart_cache,
+            "search": self._search_cache,
+            "index": self._index,
+        }
+        return {name: cache.stats for name, cache in caches.items() if cache is not None}
+
+    @property
+    def coalesced_requests(self) -> int:
+        """Number of calls served by joining an identical request already in flight"""
+        return self._coalesced_requests
+
+    @property
+    def rate_limiter(self) -> Union[RateLimiter, TokenBucket]:
+        return self._rate_limiter
+
+    async def __aenter__(self) -> "PyOnVista":
+        if self._client is None:
+            await self.install_client(create_session(
+                create_connector(limit_per_host=self._max_in_flight)
+            ))
+            self._owns_client = True
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """
+        Closes the client if it was created by this api (see __aenter__).
+        """
+        if self._owns_client and self._client is not None:
+            await self._client.close()
+            self._client = None
+            self._transport = None
+            self._owns_client = False
 
     async def install_client(self, client: Any):
         """
@@ -506,6 +763,8 @@ class PyOnVista:
         to follow redirects. Otherwise, you'll be warned.
 
         If you run an async client this function will check for a running loop. An keeps a weakref to it.
+        For best throughput use a session created by transport.create_session,
+        or use the api as async context manager which does so.
         :param client:
         :return:
         """
@@ -519,44 +778,54 @@ class PyOnVista:
         else:
             raise AttributeError(f"The provided client {client} seems not have an async get method")
 
-    async def _get_json(self, url: str, *args, **kwargs) -> Optional[Dict]:
+        self._transport = Transport(
+            client,
+            max_in_flight=self._max_in_flight,
+            rate_limiter=self._rate_limiter,
+            timeout=self._timeout,
+            decoder=self._decoder
+        )
+
+    async def _get_json(self, url: str, *args, decoder: Optional[Decoder] = None, **kwargs) -> Optional[Dict]:
         """
         Enhanced JSON fetcher with rate limiting and error handling.
+        Concurrent calls overlap up to max_in_flight requests.
+        Concurrent calls for the same url share a single request; all callers
+        receive the same dict, which must therefore not be mutated.
         
         Args:
             url: URL to fetch
             *args: Additional arguments for aiohttp
+            decoder: Decoder for this response (default: the api decoder).
+                Callers of the same url must use the same decoder.
             **kwargs: Additional keyword arguments for aiohttp
             
         Returns:
             Dict containing JSON response or None if failed
         """
-        # Rate limiting
-        current_time = datetime.datetime.now().timestamp()
-        time_since_last = current_time - self._last_request_time
-        if time_since_last < self._request_delay:
-            await asyncio.sleep(self._request_delay - time_since_last)
-        
-        self._last_request_time = datetime.datetime.now().timestamp()
-        
-        try:
-            timeout = aiohttp.ClientTimeout(total=self._timeout)
-            async with self._client.get(url, timeout=timeout, *args, **kwargs) as response:
-                if response.status == 200:
-                    return dict(await response.json())
-                elif response.status == 429:  # Rate limited
-                    logger.warning(f"Rate limited, waiting longer for URL: {url}")
-                    await asyncio.sleep(1.0)
-                    return await self._get_json(url, *args, **kwargs)  # Retry once
-                else:
-                    logger.warning(f"HTTP {response.status} for URL: {url}")
-                    return None
-        except asyncio.TimeoutError:
-            logger.error(f"Timeout for URL: {url}")
-            return None
-        except Exception as e:
-            logger.error(f"Error fetching {url}: {str(e)}")
-            return None
+        if self._transport is None:
+            raise RuntimeError("No client installed. Call install_client first.")
+        if args or kwargs:
+            return await self._transport.get_json(url, *args, decoder=decoder, **kwargs)
+        data, _ = await self._get_json_sized(url, decoder=decoder)
+        return data
+
+    async def _get_json_sized(self, url: str, decoder: Optional[Decoder] = None) -> Tuple[Optional[Dict], int]:
+        """
+        Like _get_json, also returning the size of the response body in bytes,
+        which the response caches are given instead of serializing the dict again.
+        """
+        if self._transport is None:
+            raise RuntimeError("No client installed. Call install_client first.")
+        future = self._pending.get(url)
+        if future is None:
+            future = asyncio.ensure_future(self._transport.get_json_sized(url, decoder=decoder))
+            self._pending[url] = future
+            future.add_done_callback(lambda f: self._pending.pop(url) if self._pending.get(url) is f else None)
+        else:
+            self._coalesced_requests += 1
+        # a cancelled caller must not cancel the request of the others
+        return await asyncio.shield(future)
 
     async def search_instrument(self, key: str, instrument_type: Optional[str] = None, 
                               country: Optional[str] = None, limit: int = 50) -> List[Instrument]:
@@ -576,42 +845,47 @@ class PyOnVista:
             raise ValueError("Search key cannot be empty")
         
         limit = min(max(1, limit), 500)  # Get more results to filter from
-        
+
+        if self._index is not None:
+            # only identifiers: the index may know just some of the instruments matching a name
+            entries = [entry for entry in self._index.exact(key)
+                       if _search_match(entry, instrument_type, country)]
+            if entries:
+                return _from_search_results(entries, limit, self._instruments)
+
+        if self._search_cache is not None:
+            entries = self._search_cache.get(key, instrument_type, country, limit)
+            if entries is not None:
+                return _from_search_results(entries, limit, self._instruments)
+
+        per_type = 100 if country else min(limit, 100)
         params = {
-            "perType": 100,  # Get maximum from API
+            # results are only dropped after the request when filtering by country
+            "perType": per_type,
             "searchValue": key.strip()
         }
             
-        url = make_url(ONVISTA_API_BASE, *["instruments", "search", "facet"], **params)
+        url = make_url(self._api_base, *["instruments", "search", "facet"], **params)
         json_data = await self._get_json(url)
         
         if not json_data or "facets" not in json_data:
             return []
-            
-        results = []
-        for facet in json_data["facets"]:
-            if facet_results := facet.get("results"):
-                try:
-                    results.extend([Instrument.from_json(data) for data in facet_results])
-                except Exception as e:
-                    logger.warning(f"Error parsing instrument data: {str(e)}")
-                    continue
-        
-        # Apply client-side filters
-        filtered_results = results
-        
+        if self._index is not None:
+            self._index.add_search(json_data)
+
+        facets = json_data["facets"]
         if instrument_type:
-            instrument_type = instrument_type.upper()
-            filtered_results = [r for r in filtered_results if r.type == instrument_type]
-        
-        if country:
-            country = country.upper()
-            # Filter by ISIN country code (first 2 characters)
-            filtered_results = [r for r in filtered_results 
-                              if r.isin and r.isin[:2] == country]
-        
-        # Apply limit
-        return filtered_results[:limit]
+            # the facet of the type holds all its results
+            matching = [facet for facet in facets if facet.get("type") == instrument_type.upper()]
+            facets = matching or facets
+
+        # Filter the raw results, only instruments returned are constructed
+        entries = [data for facet in facets for data in facet.get("results") or ()
+                   if _search_match(data, instrument_type, country)]
+        if self._search_cache is not None:
+            complete = all(_facet_complete(facet, per_type) for facet in facets)
+            self._search_cache.set(key, instrument_type, country, entries, complete)
+        return _from_search_results(entries, limit, self._instruments)
 
     async def search_by_isin(self, isin: str) -> Optional[Instrument]:
         """
@@ -621,10 +895,14 @@ class PyOnVista:
             isin: International Securities Identification Number
             
         Returns:
-            Instrument if found, None otherwise
+            Instrument if found, None otherwise. An instrument found in the
+            local index carries no snapshot, see request_instrument.
         """
         if not isin or len(isin.strip()) != 12:
             raise ValueError("ISIN must be exactly 12 characters")
+
+        if self._index is not None and (entry := self._index.get(isin)) is not None:
+            return Instrument.from_json(entry, self._instruments)
         
         try:
             return await self.request_instrument(isin=isin.strip().upper())
@@ -652,31 +930,63 @@ class PyOnVista:
         # Add country-specific searches if provided
         if country:
             search_terms.append(f"{symbol}.{country}")
-            
-        results = []
-        for term in search_terms:
-            try:
-                instruments = await self.search_instrument(term, instrument_type="STOCK", country=country)
-                results.extend(instruments)
-            except Exception as e:
-                logger.debug(f"Search failed for term {term}: {str(e)}")
-                continue
-                
-        # Remove duplicates based on ISIN
-        seen_isins = set()
-        unique_results = []
-        for instrument in results:
-            if instrument.isin and instrument.isin not in seen_isins:
-                seen_isins.add(instrument.isin)
-                unique_results.append(instrument)
-                
-        return unique_results
+
+        found = await self.search_many(search_terms, instrument_type="STOCK", country=country)
+
+        # Remove duplicates based on ISIN, keeping the order of the terms
+        unique_results: Dict[str, Instrument] = {}
+        for instruments in found.values():
+            for instrument in instruments:
+                if instrument.isin:
+                    unique_results.setdefault(instrument.isin, instrument)
+
+        return list(unique_results.values())
+
+    async def search_many(self, terms: Iterable[str], instrument_type: Optional[str] = None,
+                          country: Optional[str] = None, limit: int = 50,
+                          concurrency: int = 10) -> Dict[str, List[Instrument]]:
+        """
+        Runs search_instrument for many terms concurrently.
+        An instrument found by several terms is represented by one shared object,
+        as all searches of the api return the live instrument of an isin.
+        A failing search is logged and yields no results.
+
+        Args:
+            terms: Search terms, e.g. a list of ticker symbols
+            instrument_type: Filter by type, see search_instrument
+            country: Filter by country code, see search_instrument
+            limit: Maximum number of results per term (default 50)
+            concurrency: Number of searches running in parallel (default: 10)
+
+        Returns:
+            Mapping of each term to its results, in the order of terms
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+
+        results: Dict[str, List[Instrument]] = {term: [] for term in terms}
+        pending = iter(list(results))
+
+        async def worker():
+            for term in pending:
+                try:
+                    instruments = await self.search_instrument(term, instrument_type, country, limit)
+                except Exception as e:
+                    logger.debug(f"Search failed for term {term}: {str(e)}")
+                    continue
+                results[term] = instruments
+
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, len(results)))))
+        return results
 
     async def request_instrument(self, instrument: Instrument = None, isin: str = None) -> Instrument:
         """
         If instrument is provided, the instrument is updated.
-        If a isin is provided a new instrument is provided.
+        If a isin is provided, the live instrument of the isin returned by
+        earlier calls is updated, otherwise a new instrument is provided.
         Enhanced in v2.0 to store full snapshot data for fundamental analysis.
+        With a snapshot cache installed, snapshots are served from memory until they expire.
+        How much of the snapshot the instrument keeps depends on the retention policy.
         
         :param instrument: Existing instrument to update
         :param isin: ISIN to fetch instrument data for
@@ -685,60 +995,111 @@ class PyOnVista:
         isin = isin or (instrument.isin if instrument else None)
         if not isin:
             raise AttributeError("At least one argument must be provided")
+        if not instrument:
+            instrument = self._instruments.get(isin.upper())
         if not instrument:
             instrument = Instrument()
             instrument.isin = isin
+        # registered before the request, concurrent calls for the isin share the instrument
+        _register_identity(self._instruments, instrument)
 
         # Map instrument type for API endpoint
         type_ = snapshot_map.get(getattr(instrument, 'type', None), 'stocks')
         
         url = make_url(
-            ONVISTA_API_BASE,
+            self._api_base,
             type_,
             f"ISIN:{isin}",
             "snapshot"
         )
         
-        data = await self._get_json(url)
-        if not data:
-            raise ValueError(f"No data found for ISIN: {isin}")
-            
-        # Update instrument with full snapshot data for v2.0 features
-        _update_instrument(
-            instrument, 
-            data["instrument"], 
-            data.get("quote"), 
-            full_snapshot=data  # Store complete snapshot for fundamental data extraction
-        )
-        
-        # Add market notations
-        if "quoteList" in data and "list" in data["quoteList"]:
-            _add_notation(instrument, notations=data["quoteList"]["list"])
-            
+        data = self._snapshot_cache.get(url) if self._snapshot_cache is not None else None
+        if data is None:
+            data, size = await self._get_json_sized(url, decoder=self._snapshot_decoder)
+            if not data:
+                raise ValueError(f"No data found for ISIN: {isin}")
+            if self._snapshot_cache is not None and data.get("instrument", {}).get("expires"):
+                self._snapshot_cache.set(url, data, float(data["instrument"]["expires"]), size=size)
+            if self._index is not None:
+                self._index.add_snapshot(data)
+
+        _retain(_apply_snapshot(instrument, data), self._retention)
+        _register_identity(self._instruments, instrument)
         return instrument
 
-    async def request_quotes(
+    async def request_instruments(
             self,
-            instrument: Instrument,
-            start: datetime.datetime = None,
-            end: datetime.datetime = None,
-            resolution: Literal["1m", "15m", "1D"] = "15m",
-            notation: Notation = None,
-
-    ) -> list[Quote]:
+            instruments: Iterable[Union[str, Instrument]],
+            concurrency: int = 10
+    ) -> AsyncIterator[BatchResult]:
         """
-        Gets historic quotes form on vista api.
+        Requests snapshots for many instruments at once.
+        Items are fetched by a pool of workers and yielded in order of completion.
+        A failing item is reported by its BatchResult and does not abort the batch.
+
+        Args:
+            instruments: ISINs or Instrument objects to request (Instruments are updated)
+            concurrency: Number of workers requesting in parallel (default: 10)
+
+        Returns:
+            Async iterator of BatchResult
         """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+
+        items = iter(instruments)
+        # bounded, so workers pause while the consumer is busy
+        results: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+        done = object()
+
+        async def worker():
+            try:
+                for item in items:
+                    if isinstance(item, Instrument):
+                        isin, kwargs = item.isin, {"instrument": item}
+                    else:
+                        isin, kwargs = item, {"isin": item}
+                    try:
+                        result = BatchResult(isin, instrument=await self.request_instrument(**kwargs))
+                    except Exception as e:
+                        logger.debug(f"Batch request failed for {isin}: {str(e)}")
+                        result = BatchResult(isin, error=e)
+                    await results.put(result)
+            except Exception as e:
+                # the iterable itself failed, hand over to the consumer
+                await results.put(e)
+            await results.put(done)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(concurrency)]
         try:
-            notation = notation or instrument.notations[0]
-        except IndexError:
-            instrument = await self.request_instrument(instrument)
-            notation = instrument.notations[0]
+            running = len(workers)
+            while running:
+                result = await results.get()
+                if result is done:
+                    running -= 1
+                elif isinstance(result, Exception):
+                    raise result
+                else:
+                    yield result
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
 
-        start = start or datetime.datetime.now() - datetime.timedelta(days=7)
-        end = end or datetime.datetime.now()+datetime.timedelta(days=1)
+    async def _request_chart_history(
+            self,
+            instrument: Instrument,
+            notation: Notation,
+            resolution: str,
+            start: datetime.date,
+            end: datetime.date
+    ) -> Optional[Dict]:
+        """
+        Requests the chart_history of the days [start, end].
+        With a chart cache installed, responses are served from it.
+        """
         request_data = make_url(
-            ONVISTA_API_BASE,
+            self._api_base,
             "instruments",
             str(instrument.type),
             str(instrument.uid),
@@ -749,23 +1110,243 @@ class PyOnVista:
             startDate=start.strftime("%Y-%m-%d"),
         )
 
-        data = await self._get_json(request_data)
+        data = self._chart_cache.get(request_data) if self._chart_cache is not None else None
+        if data is None:
+            data, size = await self._get_json_sized(request_data)
+            if data and self._chart_cache is not None:
+                if end < datetime.date.today():
+                    ttl = HISTORIC_CHART_TTL
+                else:
+                    ttl = self._chart_cache_ttl
+                self._chart_cache.set(request_data, data, datetime.datetime.now().timestamp() + ttl, size=size)
+        return data
+
+    async def _resolve_notation(self, instrument: Instrument, notation: Optional[Notation]
+                                ) -> Tuple[Instrument, Notation]:
+        """
+        Returns notation or the first notation of the instrument, requesting it if unknown.
+        """
+        try:
+            notation = notation or instrument.notations[0]
+        except IndexError:
+            instrument = await self.request_instrument(instrument)
+            notation = instrument.notations[0]
+        return instrument, notation
+
+    async def _request_bars(
+            self,
+            instrument: Instrument,
+            start: Optional[datetime.datetime],
+            end: Optional[datetime.datetime],
+            resolution: str,
+            notation: Optional[Notation]
+    ) -> Tuple[Instrument, Notation, Iterable[tuple]]:
+        """
+        Requests bars as (timestamp, open, high, low, close, volume, pieces) tuples.
+        Windows longer than chunk_days are requested in concurrent chunks and merged.
+        With a quote cache installed, only days not downloaded before are requested.
+        Like a single request, the whole window or no bars are returned: if a chunk
+        fails, its range is logged and nothing is returned.
+        """
+        instrument, notation = await self._resolve_notation(instrument, notation)
+        start = start or datetime.datetime.now() - datetime.timedelta(days=7)
+        end = end or datetime.datetime.now()+datetime.timedelta(days=1)
+
+        if self._quote_cache is None:
+            chunks = self._chunks([(start.date(), end.date())], resolution)
+            responses = await self._request_chunks(instrument, notation, resolution, chunks)
+            if not self._chunks_complete(instrument, resolution, chunks, responses):
+                return instrument, notation, []
+            if len(responses) == 1:
+                return instrument, notation, iter_bars(responses[0])
+            return instrument, notation, merge_bars(responses)
+
+        key = self._quote_cache.key(instrument, notation, resolution)
+        chunks = self._chunks(self._quote_cache.missing_ranges(key, start.date(), end.date()), resolution)
+        responses = await self._request_chunks(instrument, notation, resolution, chunks)
+        # each chunk is stored with its own range, a failed one stays missing and is requested again
+        for (low, high), data in zip(chunks, responses):
+            if data:
+                self._quote_cache.add(key, low, high, data)
+        if not self._chunks_complete(instrument, resolution, chunks, responses):
+            return instrument, notation, []
+        return instrument, notation, self._quote_cache.bars(key, start.date(), end.date())
+
+    @staticmethod
+    def _chunks_complete(
+            instrument: Instrument,
+            resolution: str,
+            chunks: List[Tuple[datetime.date, datetime.date]],
+            responses: List[Optional[Dict]]
+    ) -> bool:
+        """
+        Returns whether all chunks were received, logging the ranges of failed ones.
+        """
+        failed = [f"{low}..{high}" for (low, high), data in zip(chunks, responses) if not data]
+        if failed:
+            logger.warning(f"Chart history of {instrument.uid} {resolution} failed for {', '.join(failed)}, "
+                           f"no bars are returned")
+        return not failed
+
+    def _chunks(self, ranges: List[Tuple[datetime.date, datetime.date]], resolution: str
+                ) -> List[Tuple[datetime.date, datetime.date]]:
+        chunk_days = self.chunk_days.get(resolution, CHUNK_DAYS["1D"])
+        return [chunk for low, high in ranges for chunk in split_range(low, high, chunk_days)]
+
+    async def _request_chunks(
+            self,
+            instrument: Instrument,
+            notation: Notation,
+            resolution: str,
+            chunks: List[Tuple[datetime.date, datetime.date]]
+    ) -> List[Optional[Dict]]:
+        """
+        Requests the chart_history of all chunks concurrently and records their timings.
+        """
+        async def timed(low: datetime.date, high: datetime.date) -> Optional[Dict]:
+            started = time.perf_counter()
+            data = await self._request_chart_history(instrument, notation, resolution, low, high)
+            seconds = time.perf_counter() - started
+            bars = len(data["datetimeLast"]) if data else 0
+            self.chunk_timings.append(ChunkTiming(str(instrument.uid), resolution, low, high, seconds, bars))
+            logger.debug(f"chart_history {instrument.uid} {resolution} {low}..{high}: {bars} bars in {seconds:.3f}s")
+            return data
+
+        return list(await asyncio.gather(*(timed(low, high) for low, high in chunks)))
+
+    async def request_quotes(
+            self,
+            instrument: Instrument,
+            start: datetime.datetime = None,
+            end: datetime.datetime = None,
+            resolution: Literal["1m", "15m", "1D"] = "15m",
+            notation: Notation = None,
+
+    ) -> list[Quote]:
+        """
+        Gets historic quotes form on vista api.
+        With a chart cache installed, responses are served from it.
+        With a quote cache installed, only days not downloaded before are requested.
+        For long histories prefer request_quote_series, which stores bars in columns.
+        """
+        instrument, notation, bars = await self._request_bars(instrument, start, end, resolution, notation)
 
         result = []
-        if data:
-            quotes = zip(
-                data["datetimeLast"],
-                data["first"],
-                data["last"],
-                data["high"],
-                data["low"],
-                data["volume"],
-                data["numberPrices"]
+        for date, first, high, low, last, volume, pieces in bars:
+            result.append(
+                Quote(resolution, datetime.datetime.fromtimestamp(date), first, high, low, last, volume,
+                      pieces, instrument)
             )
-            for date, first, last, high, low, volume, pieces in quotes:
-                result.append(
-                    Quote(resolution, datetime.datetime.fromtimestamp(date), first, high, low, last, volume,
-                          pieces, instrument)
-                )
 
         return result
+
+    async def request_quote_series(
+            self,
+            instrument: Instrument,
+            start: datetime.datetime = None,
+            end: datetime.datetime = None,
+            resolution: Literal["1m", "15m", "1D"] = "15m",
+            notation: Notation = None,
+    ) -> QuoteSeries:
+        """
+        Gets historic quotes like request_quotes, but as columnar QuoteSeries.
+        Quote objects are only created for rows accessed.
+        """
+        instrument, notation, bars = await self._request_bars(instrument, start, end, resolution, notation)
+        return QuoteSeries(resolution, instrument, notation, bars)
+
+    async def update_quotes(self, series: QuoteSeries, end: datetime.datetime = None) -> int:
+        """
+        Brings a series returned by request_quote_series up to date in place.
+        Only the days from the last bar onward are requested: newer bars are
+        appended and the last bar is replaced, as it may have been revised.
+        An empty series is filled with the default window of request_quotes.
+
+        Args:
+            series: Series to update, it must carry its instrument
+            end: Last day (default: tomorrow)
+
+        Returns:
+            Number of bars appended
+        """
+        if series.instrument is None:
+            raise ValueError("The series carries no instrument to request quotes for")
+        instrument, notation, bars = await self._request_bars(
+            series.instrument, series.last_timestamp, end, series.resolution, series.notation
+        )
+        series.instrument, series.notation = instrument, notation
+        return series.merge_tail(bars)
+
+    async def iter_quotes(
+            self,
+            instrument: Instrument,
+            start: datetime.datetime = None,
+            end: datetime.datetime = None,
+            resolution: Literal["1m", "15m", "1D"] = "15m",
+            notation: Notation = None,
+            since: Optional[datetime.datetime] = None,
+            blocks: bool = False,
+            prefetch: int = 1
+    ) -> AsyncIterator[Union[Quote, QuoteSeries]]:
+        """
+        Streams historic quotes chunk by chunk (see chunk_days) in chronological order.
+        At most prefetch chunks are requested ahead of the consumer, so the whole
+        history is never held in memory. The quote cache is not used.
+
+        Args:
+            instrument: Instrument to request quotes for
+            start: First day (default: 7 days ago)
+            end: Last day (default: tomorrow)
+            resolution: Resolution of the bars (default: 15m)
+            notation: Notation to request (default: first notation of instrument)
+            since: Resume after this timestamp, e.g. the last quote stored before an interruption
+            blocks: Yield a QuoteSeries per chunk instead of single quotes (default: False)
+            prefetch: Number of chunks requested ahead (default: 1)
+
+        Returns:
+            Async iterator of Quote, or of QuoteSeries if blocks is set
+
+        Raises:
+            ValueError: if a chunk could not be requested; resume with since set to the
+                last quote received
+        """
+        if prefetch < 0:
+            raise ValueError("prefetch must not be negative")
+        instrument, notation = await self._resolve_notation(instrument, notation)
+        start = start or datetime.datetime.now() - datetime.timedelta(days=7)
+        end = end or datetime.datetime.now()+datetime.timedelta(days=1)
+        last_stamp = float("-inf")
+        if since is not None:
+            start = max(start, since)
+            last_stamp = since.timestamp()
+
+        chunks = collections.deque(self._chunks([(start.date(), end.date())], resolution))
+        pending: Deque[Tuple[Tuple[datetime.date, datetime.date], asyncio.Future]] = collections.deque()
+        try:
+            while chunks or pending:
+                while chunks and len(pending) <= prefetch:
+                    chunk = chunks.popleft()
+                    pending.append((chunk, asyncio.ensure_future(
+                        self._request_chunks(instrument, notation, resolution, [chunk])
+                    )))
+                (low, high), future = pending.popleft()
+                (data,) = await future
+                if data is None:
+                    raise ValueError(f"No chart history found for {instrument.uid} from {low} to {high}")
+
+                series = QuoteSeries(resolution, instrument, notation)
+                for bar in iter_bars(data):
+                    # drops bars already yielded by the previous chunk or before since
+                    if bar[0] > last_stamp:
+                        series.append(bar)
+                        last_stamp = bar[0]
+                if not series:
+                    continue
+                if blocks:
+                    yield series
+                else:
+                    for quote in series:
+                        yield quote
+        finally:
+            for _, future in pending:
+                future.cancel()
@@ -0,0 +1,379 @@
+"""
+Caches for onvista api responses.
+
+Snapshots carry their own expiry (the `expires` field also parsed into
+Instrument.snapshot_valid_until), so cached responses are served until the
+server says they are stale.
+"""
+import collections
+import dataclasses
+import json as jsonlib
+import pathlib
+import sqlite3
+import time
+import zlib
+from typing import (
+    Callable,
+    List,
+    Optional,
+    Tuple,
+    Union
+)
+
+from .util import tokenize
+
+
+@dataclasses.dataclass
+class CacheStats:
+    """Counters of a cache"""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def payload_size(value: dict) -> int:
+    """Size of value in bytes when serialized as compact json"""
+    return len(jsonlib.dumps(value, separators=(",", ":")).encode())
+
+
+class CacheBackend:
+    """
+    Interface of the response caches PyOnVista can be configured with.
+    Values are json dicts, expiry times are unix timestamps.
+    """
+    stats: CacheStats
+
+    def get(self, key: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: dict, expires: float, size: Optional[int] = None):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class SnapshotCache(CacheBackend):
+    def __init__(
+            self,
+            max_bytes: int = 64 * 1024 * 1024,
+            max_entries: Optional[int] = None,
+            clock: Callable[[], float] = time.time
+    ):
+        """
+        In-memory LRU cache of json responses which expire at a given time.
+
+        Args:
+            max_bytes: Upper bound of the summed payload sizes (default: 64 MiB)
+            max_entries: Upper bound of the number of entries (default: unbounded)
+            clock: Returns the current time as unix timestamp (default: time.time)
+        """
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be positive")
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self.current_bytes = 0
+        self._clock = clock
+        self._entries: "collections.OrderedDict[str, Tuple[dict, float, int]]" = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry[1] > self._clock()
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Returns the cached value or None if it is missing or expired.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        value, expires, _ = entry
+        if expires <= self._clock():
+            self._remove(key)
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    def set(self, key: str, value: dict, expires: float, size: Optional[int] = None):
+        """
+        Stores value until expires (unix timestamp).
+        Values larger than max_bytes are not cached.
+
+        Args:
+            key: Cache key, e.g. the request url
+            value: The json response
+            expires: Unix timestamp the value becomes stale
+            size: Size of the value in bytes, e.g. the length of the response
+                body. Pass it where known, the default serializes the value
+                again (default: size of the value as compact json)
+        """
+        if expires <= self._clock():
+            return
+        size = payload_size(value) if size is None else size
+        if key in self._entries:
+            self._remove(key)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (value, expires, size)
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes or (
+                self.max_entries is not None and len(self._entries) > self.max_entries):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.stats.evictions += 1
+
+    def delete(self, key: str):
+        if key in self._entries:
+            self._remove(key)
+
+    def clear(self):
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def _remove(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self.current_bytes -= size
+
+
+SearchKey = Tuple[str, Optional[str], Optional[str]]
+
+
+def search_key(term: str, instrument_type: Optional[str] = None, country: Optional[str] = None) -> SearchKey:
+    """
+    Normalized cache key of a search, case and whitespace are ignored
+    :param term: search term
+    :param instrument_type: type filter or None
+    :param country: country filter or None
+    :return: (term, type, country)
+    """
+    return (
+        " ".join(term.split()).lower(),
+        instrument_type.upper() if instrument_type else None,
+        country.upper() if country else None
+    )
+
+
+def _search_tokens(entry: dict) -> List[str]:
+    return tokenize(" ".join(str(entry.get(key) or "") for key in ("name", "isin", "wkn", "symbol")))
+
+
+def _tokens_match(query: List[str], entry: dict) -> bool:
+    """Whether every token of query starts a token of the name, isin, wkn or symbol of entry"""
+    tokens = _search_tokens(entry)
+    return all(any(token.startswith(part) for token in tokens) for part in query)
+
+
+class SearchCache:
+    def __init__(
+            self,
+            max_entries: int = 1024,
+            ttl: float = 300.0,
+            clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        In-memory LRU cache of filtered search results.
+
+        Results are keyed on the normalized search term, type and country.
+        A search missing from the cache is answered from a cached shorter
+        term, e.g. "siemens" from the results of "siem", if none of the
+        facets of that response was truncated: the results are then all
+        instruments matching "siem", and those with a token of their name,
+        isin, wkn or symbol starting with each token of the longer term
+        (tokenized like InstrumentIndex) are its results.
+
+        Args:
+            max_entries: Upper bound of the number of cached searches (default: 1024)
+            ttl: Seconds a search result is served (default: 300s)
+            clock: Returns the current time in seconds (default: time.monotonic)
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self.prefix_hits = 0
+        self._clock = clock
+        self._entries: "collections.OrderedDict[SearchKey, Tuple[List[dict], bool, float]]" = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, term: str, instrument_type: Optional[str] = None, country: Optional[str] = None,
+            limit: Optional[int] = None) -> Optional[List[dict]]:
+        """
+        Returns the cached results of a search or None if they are unknown.
+
+        Args:
+            term: Search term
+            instrument_type: Type filter of the search
+            country: Country filter of the search
+            limit: Number of results needed. A truncated response holding
+                fewer results is a miss (default: all results)
+
+        Returns:
+            Search result entries, which must not be mutated
+        """
+        text, instrument_type, country = key = search_key(term, instrument_type, country)
+        found = self._lookup(key)
+        if found is not None:
+            entries, complete = found
+            if complete or (limit is not None and len(entries) >= limit):
+                self.stats.hits += 1
+                return entries
+        for end in range(len(text) - 1, 0, -1):
+            found = self._lookup((text[:end], instrument_type, country))
+            if found is not None and found[1]:
+                query = tokenize(text)
+                entries = [entry for entry in found[0] if _tokens_match(query, entry)]
+                self.stats.hits += 1
+                self.prefix_hits += 1
+                return entries
+        self.stats.misses += 1
+        return None
+
+    def set(self, term: str, instrument_type: Optional[str], country: Optional[str],
+            entries: List[dict], complete: bool):
+        """
+        Stores the results of a search.
+
+        Args:
+            term: Search term
+            instrument_type: Type filter of the search
+            country: Country filter of the search
+            entries: All results passing the filters
+            complete: Whether entries are all instruments matching the search,
+                i.e. no facet of the response was truncated
+        """
+        key = search_key(term, instrument_type, country)
+        self._entries.pop(key, None)
+        self._entries[key] = (entries, complete, self._clock() + self.ttl)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def _lookup(self, key: SearchKey) -> Optional[Tuple[List[dict], bool]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        entries, complete, expires = entry
+        if expires <= self._clock():
+            del self._entries[key]
+            self.stats.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entries, complete
+
+
+class SQLiteCache(CacheBackend):
+    def __init__(
+            self,
+            path: Union[str, pathlib.Path],
+            compression_level: int = 6,
+            clock: Callable[[], float] = time.time
+    ):
+        """
+        Persistent cache in a SQLite database, surviving restarts of the process.
+        The database runs in WAL mode so several processes can share one file,
+        payloads are stored as zlib compressed json.
+
+        Args:
+            path: Database file, created if missing
+            compression_level: zlib level from 0 (none) to 9 (best) (default: 6)
+            clock: Returns the current time as unix timestamp (default: time.time)
+        """
+        self.path = pathlib.Path(path)
+        self.compression_level = compression_level
+        self.stats = CacheStats()
+        self._clock = clock
+        self._db = sqlite3.connect(str(self.path), isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, expires REAL NOT NULL, payload BLOB NOT NULL)"
+        )
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def __contains__(self, key: str) -> bool:
+        row = self._db.execute(
+            "SELECT 1 FROM responses WHERE key = ? AND expires > ?", (key, self._clock())
+        ).fetchone()
+        return row is not None
+
+    def __enter__(self) -> "SQLiteCache":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Returns the cached value or None if it is missing or expired.
+        """
+        row = self._db.execute("SELECT expires, payload FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.stats.misses += 1
+            return None
+        expires, payload = row
+        if expires <= self._clock():
+            self.delete(key)
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return jsonlib.loads(zlib.decompress(payload))
+
+    def set(self, key: str, value: dict, expires: float, size: Optional[int] = None):
+        """
+        Stores value until expires (unix timestamp).
+        size is accepted for compatibility with other backends and ignored.
+        """
+        if expires <= self._clock():
+            return
+        payload = zlib.compress(jsonlib.dumps(value, separators=(",", ":")).encode(), self.compression_level)
+        self._db.execute(
+            "INSERT OR REPLACE INTO responses (key, expires, payload) VALUES (?, ?, ?)",
+            (key, expires, payload)
+        )
+
+    def delete(self, key: str):
+        self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def clear(self):
+        self._db.execute("DELETE FROM responses")
+
+    def purge_expired(self) -> int:
+        """
+        Deletes all expired entries.
+
+        Returns:
+            Number of deleted entries
+        """
+        cursor = self._db.execute("DELETE FROM responses WHERE expires <= ?", (self._clock(),))
+        self.stats.expirations += cursor.rowcount
+        return cursor.rowcount
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,64 @@
+"""
+JSON decoders for api responses.
+
+Responses are read as raw bytes and decoded by the fastest decoder installed:
+orjson, then msgspec, then the standard library.
+"""
+import json as jsonlib
+from typing import (
+    Any,
+    Callable,
+    Optional,
+    Dict,
+    Union
+)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+Decoder = Callable[[bytes], Any]
+
+DECODERS: Dict[str, Decoder] = {"json": jsonlib.loads}
+if msgspec is not None:
+    DECODERS["msgspec"] = msgspec.json.decode
+if orjson is not None:
+    DECODERS["orjson"] = orjson.loads
+
+# order of preference when no decoder is requested explicitly
+PREFERENCE = ("orjson", "msgspec", "json")
+
+
+def get_decoder(decoder: Union[str, Decoder, None] = None) -> Decoder:
+    """
+    Returns a function decoding json from bytes.
+
+    Args:
+        decoder: Name of a decoder ("orjson", "msgspec", "json"), a callable
+            taking bytes, or None for the fastest decoder installed
+
+    Returns:
+        Decoder
+
+    Raises:
+        ValueError: if the named decoder is unknown or not installed
+    """
+    if callable(decoder):
+        return decoder
+    if decoder is None:
+        return next(DECODERS[name] for name in PREFERENCE if name in DECODERS)
+    try:
+        return DECODERS[decoder]
+    except KeyError:
+        raise ValueError(f"JSON decoder {decoder} is not available, use one of {list(DECODERS)}") from None
+
+
+def decoder_name(decoder: Decoder) -> Optional[str]:
+    """Returns the name of a decoder returned by get_decoder, None for custom ones"""
+    return next((name for name, known in DECODERS.items() if known is decoder), None)
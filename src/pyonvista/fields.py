@@ -0,0 +1,195 @@
+"""
+Declarative mapping of snapshot json onto the dataclasses returned by the
+Instrument.get_* methods.
+
+Each dataclass field is described by a Field: a dotted path into the snapshot
+(integers index lists, e.g. "stocksCnFundamentalList.list.0.cnPer"), a
+converter and an optional fallback path, used when the primary value is
+missing or falsy. compile_extractor turns a table of fields into a single
+function, parsing every path once up front. Converters are not called for
+missing values.
+"""
+import dataclasses
+import itertools
+import logging
+from typing import (
+    Any,
+    Callable,
+    FrozenSet,
+    Optional,
+    Iterable,
+    Iterator,
+    List,
+    Tuple,
+    Union
+)
+
+logger = logging.getLogger(__name__)
+
+Key = Union[str, int]
+
+
+def safe_float(value) -> Optional[float]:
+    """Safely convert value to float, return None if not possible."""
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def safe_int(value) -> Optional[int]:
+    """Safely convert value to int, return None if not possible."""
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def identity(value):
+    return value
+
+
+# values already of these types are returned unchanged by the converter,
+# compiled extractors skip the call for them
+PASSTHROUGH = {
+    safe_float: float,
+    safe_int: int,
+}
+
+
+@dataclasses.dataclass(frozen=True)
+class Field:
+    """Where a dataclass field is found in a snapshot"""
+    name: str
+    path: str
+    convert: Callable[[Any], Any] = identity
+    fallback: Optional[str] = None
+
+
+def parse_path(path: str) -> Tuple[Key, ...]:
+    return tuple(int(key) if key.isdigit() else key for key in path.split("."))
+
+
+def _emit_lookup(lines: List[str], node: str, tree: dict, indent: str, names: Iterator[str], assign: Callable):
+    """
+    Emits the code looking up the leaves of a tree of path keys below node.
+    Fields sharing a path prefix look the prefix up only once.
+    """
+    for leaf in tree.get(None, ()):
+        lines.extend(indent + line for line in assign(leaf, node))
+    for key, subtree in tree.items():
+        if key is None:
+            continue
+        child = next(names)
+        if isinstance(key, int):
+            lines.append(f"{indent}{child} = {node}[{key}] if isinstance({node}, list) and len({node}) > {key} else None")
+        else:
+            # in and subscript compile to single opcodes and beat a call of dict.get
+            lines.append(f"{indent}{child} = {node}[{key!r}] if {key!r} in {node} else None")
+        lines.append(f"{indent}if {child} is not None:")
+        _emit_lookup(lines, child, subtree, indent + "    ", names, assign)
+
+
+def _tree(paths: Iterable[Tuple[str, Any]]) -> dict:
+    tree: dict = {}
+    for path, leaf in paths:
+        node = tree
+        for key in parse_path(path):
+            node = node.setdefault(key, {})
+        node.setdefault(None, []).append(leaf)
+    return tree
+
+
+def project(data: Any, paths: Iterable[str]) -> Any:
+    """
+    Returns a copy of data holding only the given paths. data is not modified.
+    Lists keep the items up to the highest index a path refers to.
+    """
+    return _project(data, _tree((path, None) for path in paths))
+
+
+def _project(node: Any, tree: dict) -> Any:
+    if None in tree:
+        # the whole value at this path is used
+        return node
+    if isinstance(node, dict):
+        return {key: _project(node[key], subtree) for key, subtree in tree.items() if key in node}
+    if isinstance(node, list):
+        last = max((key for key in tree if isinstance(key, int)), default=-1)
+        return [_project(item, tree[index]) if index in tree else None
+                for index, item in enumerate(node[:last + 1])]
+    return node
+
+
+def compile_extractor(cls: type, fields: Iterable[Field]) -> Callable[[Optional[dict]], Any]:
+    """
+    Compiles a field table into a function turning a snapshot into a cls instance.
+    Fields of cls missing from the table keep their default. A fallback is
+    only used if it yields a value.
+
+    Like dataclasses and namedtuple, the function is generated as source code,
+    so every lookup is inlined.
+    """
+    fields = tuple(fields)
+    unknown = {field.name for field in fields} - {field.name for field in dataclasses.fields(cls)}
+    if unknown:
+        raise ValueError(f"{cls.__name__} has no fields {sorted(unknown)}")
+
+    converters = [f"convert_{index}" for index in range(len(fields))]
+    types = [f"type_{index}" for index in range(len(fields))]
+    names = (f"node_{index}" for index in itertools.count())
+
+    def assign(leaf, node):
+        index, name = leaf
+        if fields[index].convert is identity:
+            return [f"result.{name} = {node}"]
+        if fields[index].convert in PASSTHROUGH:
+            return [f"result.{name} = {node} if {node}.__class__ is type_{index} else convert_{index}({node})"]
+        return [f"result.{name} = convert_{index}({node})"]
+
+    def assign_fallback(leaf, node):
+        index, name = leaf
+        return [f"value = convert_{index}({node})",
+                f"if value is not None:",
+                f"    result.{name} = value"]
+
+    def section(tree: dict, indent: str, assign: Callable):
+        # every section is guarded on its own, a malformed one does not cost the others
+        lines.append(f"{indent}try:")
+        _emit_lookup(lines, "data", tree, indent + "    ", names, assign)
+        lines.append(f"{indent}except (AttributeError, KeyError, TypeError) as e:")
+        lines.append(f"{indent}    logger.debug(f'Error extracting {{cls.__name__}}: {{e}}')")
+
+    lines = ["def extract(data):",
+             "    result = cls()",
+             "    if not data:",
+             "        return result"]
+    primary = _tree((field.path, (index, field.name)) for index, field in enumerate(fields))
+    for key, subtree in primary.items():
+        section({key: subtree}, "    ", assign)
+    for index, field in enumerate(fields):
+        if field.fallback:
+            lines.append(f"    if not result.{field.name}:")
+            section(_tree([(field.fallback, (index, field.name))]), "        ", assign_fallback)
+    lines.append("    return result")
+    # the converters are bound as closure variables of a factory, like dataclasses does
+    source = "\n".join([f"def factory(cls, {', '.join(converters + types)}):"]
+                        + ["    " + line for line in lines]
+                        + ["    return extract"])
+    namespace = {"logger": logger}
+    exec(source, namespace)
+    extract = namespace["factory"](cls, *(field.convert for field in fields),
+                                   *(PASSTHROUGH.get(field.convert) for field in fields))
+    extract.__qualname__ = f"extract_{cls.__name__}"
+    extract.fields = fields
+    return extract
+
+
+def field_paths(tables: Iterable[Iterable[Field]]) -> FrozenSet[str]:
+    """All paths read by the given field tables, fallbacks included"""
+    return frozenset(path for fields in tables for field in fields
+                     for path in (field.path, field.fallback) if path)
@@ -0,0 +1,203 @@
+"""
+Helpers for historical quotes requested from the chart_history endpoint.
+
+chart_history is requested by whole days (startDate/endDate), so cached
+coverage is tracked as inclusive date ranges. Days from today onwards are
+never considered complete, since bars are still being added to them.
+"""
+import bisect
+import dataclasses
+import datetime
+from typing import (
+    Any,
+    Optional,
+    Dict,
+    List,
+    Tuple
+)
+
+from .cache import CacheStats
+
+# timestamp, open, high, low, close, volume, pieces
+Bar = Tuple[float, float, float, float, float, float, float]
+DateRange = Tuple[datetime.date, datetime.date]
+HistoryKey = Tuple[str, str, str]
+
+ONE_DAY = datetime.timedelta(days=1)
+
+# days requested per chart_history call, long windows are split into chunks of this size
+CHUNK_DAYS = {
+    # the default window of request_quotes, 7 days ago to tomorrow, is 9 days
+    "1m": 9,
+    "15m": 60,
+    "1D": 3650,
+}
+
+
+@dataclasses.dataclass
+class ChunkTiming:
+    """Timing of a single chart_history request"""
+    uid: str
+    resolution: str
+    start: datetime.date
+    end: datetime.date
+    seconds: float
+    bars: int
+
+
+def iter_bars(data: dict):
+    """Iterates over the bars of a chart_history response as Bar tuples"""
+    return zip(
+        data["datetimeLast"],
+        data["first"],
+        data["high"],
+        data["low"],
+        data["last"],
+        data["volume"],
+        data["numberPrices"]
+    )
+
+
+def merge_bars(responses: List[Optional[dict]]) -> List[Bar]:
+    """
+    Merges the bars of several chart_history responses in chronological order.
+    Bars returned by more than one response are kept once.
+    """
+    bars = {}
+    for data in responses:
+        if data:
+            for bar in iter_bars(data):
+                bars[bar[0]] = bar
+    return [bars[stamp] for stamp in sorted(bars)]
+
+
+def split_range(start: datetime.date, end: datetime.date, chunk_days: int) -> List[DateRange]:
+    """Splits [start, end] into consecutive ranges of at most chunk_days days"""
+    if chunk_days < 1:
+        raise ValueError("chunk_days must be at least 1")
+    chunks = []
+    while start <= end:
+        chunk_end = min(end, start + datetime.timedelta(days=chunk_days - 1))
+        chunks.append((start, chunk_end))
+        start = chunk_end + ONE_DAY
+    return chunks
+
+
+def day_bounds(start: datetime.date, end: datetime.date) -> Tuple[float, float]:
+    """Unix timestamps of the begin of start and the begin of the day after end"""
+    return (
+        datetime.datetime.combine(start, datetime.time.min).timestamp(),
+        datetime.datetime.combine(end + ONE_DAY, datetime.time.min).timestamp()
+    )
+
+
+def merge_ranges(ranges: List[DateRange]) -> List[DateRange]:
+    """Merges overlapping and adjacent date ranges"""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + ONE_DAY:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_ranges(start: datetime.date, end: datetime.date, covered: List[DateRange]) -> List[DateRange]:
+    """Returns the parts of [start, end] not covered by the merged ranges in covered"""
+    missing = []
+    cursor = start
+    for low, high in covered:
+        if high < cursor:
+            continue
+        if low > end:
+            break
+        if low > cursor:
+            missing.append((cursor, low - ONE_DAY))
+        cursor = max(cursor, high + ONE_DAY)
+        if cursor > end:
+            break
+    if cursor <= end:
+        missing.append((cursor, end))
+    return missing
+
+
+class _History:
+    __slots__ = ("bars", "stamps", "covered")
+
+    def __init__(self):
+        self.bars: Dict[float, Bar] = {}
+        self.stamps: List[float] = []
+        self.covered: List[DateRange] = []
+
+
+class QuoteHistoryCache:
+    """
+    Keeps downloaded bars per (instrument, notation, resolution) together with
+    the date ranges they cover, so that only missing ranges need to be fetched.
+    """
+    def __init__(self):
+        self.stats = CacheStats()
+        self._histories: Dict[HistoryKey, _History] = {}
+
+    def __len__(self) -> int:
+        return len(self._histories)
+
+    @staticmethod
+    def key(instrument: Any, notation: Any, resolution: str) -> HistoryKey:
+        return str(instrument.uid), str(notation.id), resolution
+
+    def covered(self, key: HistoryKey) -> List[DateRange]:
+        history = self._histories.get(key)
+        return list(history.covered) if history else []
+
+    def missing_ranges(self, key: HistoryKey, start: datetime.date, end: datetime.date) -> List[DateRange]:
+        """
+        Returns the date ranges within [start, end] which have to be fetched.
+        """
+        missing = subtract_ranges(start, end, self.covered(key))
+        if missing:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return missing
+
+    def add(self, key: HistoryKey, start: datetime.date, end: datetime.date, data: dict,
+            today: Optional[datetime.date] = None):
+        """
+        Stores the bars of a chart_history response for [start, end].
+        Bars already known are replaced, as the last bar of a day may be revised.
+
+        Args:
+            key: see QuoteHistoryCache.key
+            start: First day requested
+            end: Last day requested
+            data: chart_history response
+            today: Days from today onwards are not marked as covered (default: date.today())
+        """
+        history = self._histories.setdefault(key, _History())
+        fresh = False
+        for bar in iter_bars(data):
+            if bar[0] not in history.bars:
+                fresh = True
+            history.bars[bar[0]] = bar
+        if fresh:
+            history.stamps = sorted(history.bars)
+
+        complete_until = min(end, (today or datetime.date.today()) - ONE_DAY)
+        if start <= complete_until:
+            history.covered = merge_ranges(history.covered + [(start, complete_until)])
+
+    def bars(self, key: HistoryKey, start: datetime.date, end: datetime.date) -> List[Bar]:
+        """
+        Returns the cached bars of the days [start, end] in chronological order.
+        """
+        history = self._histories.get(key)
+        if history is None:
+            return []
+        low, high = day_bounds(start, end)
+        first = bisect.bisect_left(history.stamps, low)
+        last = bisect.bisect_left(history.stamps, high)
+        return [history.bars[stamp] for stamp in history.stamps[first:last]]
+
+    def clear(self):
+        self._histories.clear()
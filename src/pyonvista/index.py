@@ -0,0 +1,195 @@
+"""
+A local index of instruments seen in search and snapshot responses.
+
+The index keeps the identifying fields of every instrument (the entries of a
+search response) and answers exact ISIN, WKN and symbol lookups as well as
+prefix searches over the tokens of instrument names without a request.
+It can be persisted to a json file and loaded again on the next run.
+"""
+import bisect
+import json as jsonlib
+import os
+import pathlib
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Union
+)
+
+from .cache import CacheStats
+from .util import tokenize
+
+# fields of a search result kept per instrument, enough for Instrument.from_json
+ENTRY_KEYS = ("entityType", "entityValue", "name", "isin", "wkn", "symbol", "urls")
+
+class InstrumentIndex:
+    def __init__(self, path: Union[str, pathlib.Path, None] = None):
+        """
+        Index of instruments by isin, wkn, symbol and name tokens.
+
+        Args:
+            path: json file the index is loaded from if it exists and saved
+                to by save() (default: in memory only)
+        """
+        self.path = pathlib.Path(path) if path is not None else None
+        self.stats = CacheStats()
+        self._entries: Dict[str, dict] = {}
+        self._wkns: Dict[str, str] = {}
+        self._symbols: Dict[str, Set[str]] = {}
+        self._tokens: Dict[str, Set[str]] = {}
+        self._sorted_tokens: Optional[List[str]] = None
+        if self.path is not None and self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                self.update(jsonlib.load(f))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, isin: str) -> bool:
+        return isin.upper() in self._entries
+
+    def add(self, entry: dict):
+        """
+        Adds an instrument, e.g. a search result or the instrument section
+        of a snapshot. The fields of a known instrument are updated, fields
+        missing from entry (a snapshot carries no wkn) are kept.
+        Entries without isin are ignored.
+        """
+        isin = entry.get("isin")
+        if not isin:
+            return
+        isin = isin.upper()
+        entry = {key: entry[key] for key in ENTRY_KEYS if entry.get(key)}
+        previous = self._entries.get(isin)
+        if previous is not None:
+            self._forget(isin, previous)
+            entry = {**previous, **entry}
+        self._entries[isin] = entry
+        if entry.get("wkn"):
+            self._wkns[entry["wkn"].upper()] = isin
+        if entry.get("symbol"):
+            self._symbols.setdefault(entry["symbol"].upper(), set()).add(isin)
+        for token in tokenize(entry.get("name", "")):
+            if token not in self._tokens:
+                self._sorted_tokens = None
+            self._tokens.setdefault(token, set()).add(isin)
+
+    def update(self, entries: Iterable[dict]):
+        for entry in entries:
+            self.add(entry)
+
+    def add_search(self, data: dict):
+        """Adds the results of a search/facet response"""
+        for facet in data.get("facets") or ():
+            self.update(facet.get("results") or ())
+
+    def add_snapshot(self, data: dict):
+        """Adds the instrument of a snapshot response"""
+        if data.get("instrument"):
+            self.add(data["instrument"])
+
+    def get(self, identifier: str) -> Optional[dict]:
+        """
+        Exact lookup by isin or wkn.
+        """
+        identifier = identifier.strip().upper()
+        entry = self._entries.get(identifier) or self._entries.get(self._wkns.get(identifier, ""))
+        self._count(entry is not None)
+        return entry
+
+    def by_symbol(self, symbol: str) -> List[dict]:
+        """All instruments trading under symbol"""
+        entries = self._sorted(self._symbols.get(symbol.strip().upper(), ()))
+        self._count(bool(entries))
+        return entries
+
+    def exact(self, identifier: str) -> List[dict]:
+        """
+        Instruments whose isin, wkn or symbol is identifier. Unlike name
+        matches, these are all instruments the api would find by identifier.
+        """
+        entries = self._sorted(self._exact(identifier.strip().upper()))
+        self._count(bool(entries))
+        return entries
+
+    def search(self, text: str, limit: Optional[int] = None) -> List[dict]:
+        """
+        Instruments matching text: exact isin, wkn or symbol matches first,
+        then instruments whose name has a token starting with every token of
+        text (e.g. "volksw vz" finds "Volkswagen (VW) Vz").
+
+        Args:
+            text: Search term
+            limit: Maximum number of results (default: all)
+
+        Returns:
+            Entries in the layout of search results
+        """
+        exact = self._exact(text.strip().upper())
+        names: Optional[Set[str]] = None
+        for token in tokenize(text):
+            matches = self._prefixed(token)
+            names = matches if names is None else names & matches
+            if not names:
+                break
+        entries = self._sorted(exact) + self._sorted((names or set()) - exact)
+        self._count(bool(entries))
+        return entries[:limit] if limit is not None else entries
+
+    def save(self, path: Union[str, pathlib.Path, None] = None):
+        """
+        Writes the index to path (default: the path it was created with).
+        The file is replaced atomically.
+        """
+        path = pathlib.Path(path) if path is not None else self.path
+        if path is None:
+            raise ValueError("No path to save the index to")
+        temporary = path.with_name(path.name + ".tmp")
+        with open(temporary, "w", encoding="utf-8") as f:
+            jsonlib.dump(list(self._entries.values()), f, separators=(",", ":"))
+        os.replace(temporary, path)
+
+    def clear(self):
+        self._entries.clear()
+        self._wkns.clear()
+        self._symbols.clear()
+        self._tokens.clear()
+        self._sorted_tokens = None
+
+    def _exact(self, key: str) -> Set[str]:
+        exact = set(self._symbols.get(key, ()))
+        for isin in (key, self._wkns.get(key)):
+            if isin in self._entries:
+                exact.add(isin)
+        return exact
+
+    def _prefixed(self, prefix: str) -> Set[str]:
+        if self._sorted_tokens is None:
+            self._sorted_tokens = sorted(self._tokens)
+        tokens = self._sorted_tokens
+        matches = set()
+        for position in range(bisect.bisect_left(tokens, prefix), len(tokens)):
+            if not tokens[position].startswith(prefix):
+                break
+            matches |= self._tokens[tokens[position]]
+        return matches
+
+    def _sorted(self, isins: Iterable[str]) -> List[dict]:
+        return sorted((self._entries[isin] for isin in isins), key=lambda entry: (entry.get("name", ""), entry["isin"]))
+
+    def _forget(self, isin: str, entry: dict):
+        if entry.get("wkn") and self._wkns.get(entry["wkn"].upper()) == isin:
+            del self._wkns[entry["wkn"].upper()]
+        if entry.get("symbol"):
+            self._symbols.get(entry["symbol"].upper(), set()).discard(isin)
+        for token in tokenize(entry.get("name", "")):
+            self._tokens.get(token, set()).discard(isin)
+
+    def _count(self, hit: bool):
+        if hit:
+            self.stats.hits += 1
+        else:
+            self.stats.misses += 1
@@ -0,0 +1,232 @@
+"""
+Polling of the current quotes of many instruments.
+
+A QuotePoller refreshes the snapshots of all subscribed instruments from a
+single task. Instruments due are requested in batches through the api, so all
+requests share its rate limiter and connection pool. A snapshot is not
+requested again before it expires (Instrument.snapshot_valid_until), and
+subscribers are only called with quotes that differ from the last one they
+received.
+"""
+import asyncio
+import dataclasses
+import heapq
+import logging
+import time
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union
+)
+
+from .api import Instrument, PyOnVista, Quote
+
+logger = logging.getLogger(__name__)
+
+QuoteCallback = Callable[[Quote], Awaitable[None]]
+
+
+def quote_key(quote: Quote) -> tuple:
+    """Values of a quote compared to detect a change"""
+    return quote.timestamp, quote.open, quote.high, quote.low, quote.close, quote.volume, quote.pieces
+
+
+@dataclasses.dataclass
+class Subscription:
+    """An instrument polled by a QuotePoller and its subscribers"""
+    isin: str
+    instrument: Optional[Instrument] = None
+    # callbacks and the key of the last quote each received
+    callbacks: Dict[QuoteCallback, Optional[tuple]] = dataclasses.field(default_factory=dict)
+    due: float = 0.0
+
+
+class QuotePoller:
+    def __init__(
+            self,
+            api: PyOnVista,
+            interval: float = 60.0,
+            batch_size: int = 10,
+            stagger: float = 0.0,
+            clock: Callable[[], float] = time.time,
+            sleep: Callable[[float], Awaitable[None]] = asyncio.sleep
+    ):
+        """
+        Polls the snapshots of subscribed instruments and pushes changed quotes.
+
+        Args:
+            api: Api the snapshots are requested with, its rate limiter applies
+            interval: Minimum seconds between two requests of an instrument.
+                Instruments are not requested before their snapshot expires (default: 60s)
+            batch_size: Instruments requested concurrently (default: 10)
+            stagger: Seconds between two batches of the same poll (default: 0s)
+            clock: Returns the current time as unix timestamp (default: time.time)
+            sleep: Coroutine function waiting a number of seconds (default: asyncio.sleep)
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.api = api
+        self.interval = interval
+        self.batch_size = batch_size
+        self.stagger = stagger
+        self._clock = clock
+        self._sleep = sleep
+        self._subscriptions: Dict[str, Subscription] = {}
+        # (due, isin), entries of changed or removed subscriptions are skipped
+        self._schedule: List[Tuple[float, str]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    def __contains__(self, isin: str) -> bool:
+        return isin.upper() in self._subscriptions
+
+    async def __aenter__(self) -> "QuotePoller":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    def subscribe(self, instrument: Union[str, Instrument], callback: QuoteCallback) -> Subscription:
+        """
+        Subscribes callback to the quotes of instrument. A new instrument is
+        requested with the next poll, callbacks added to a polled instrument
+        receive its quote with the next refresh.
+
+        Args:
+            instrument: ISIN or Instrument
+            callback: Coroutine function called with each changed Quote
+
+        Returns:
+            Subscription of the instrument
+        """
+        isin = (instrument if isinstance(instrument, str) else instrument.isin).strip().upper()
+        if not isin:
+            raise ValueError("Instrument has no isin")
+        subscription = self._subscriptions.get(isin)
+        if subscription is None:
+            subscription = self._subscriptions[isin] = Subscription(isin)
+            self._set_due(subscription, self._clock())
+            if self._wakeup is not None:
+                self._wakeup.set()
+        if isinstance(instrument, Instrument):
+            subscription.instrument = instrument
+        subscription.callbacks.setdefault(callback, None)
+        return subscription
+
+    def unsubscribe(self, instrument: Union[str, Instrument], callback: Optional[QuoteCallback] = None):
+        """
+        Removes callback, or all callbacks, from instrument. An instrument
+        without callbacks is no longer polled.
+        """
+        isin = (instrument if isinstance(instrument, str) else instrument.isin).strip().upper()
+        subscription = self._subscriptions.get(isin)
+        if subscription is None:
+            return
+        if callback is not None:
+            subscription.callbacks.pop(callback, None)
+        if callback is None or not subscription.callbacks:
+            del self._subscriptions[isin]
+
+    def next_due(self) -> Optional[float]:
+        """Time the next instrument is due, None without subscriptions"""
+        while self._schedule:
+            due, isin = self._schedule[0]
+            subscription = self._subscriptions.get(isin)
+            if subscription is not None and subscription.due == due:
+                return due
+            heapq.heappop(self._schedule)
+        return None
+
+    async def poll(self) -> int:
+        """
+        Requests all instruments due, batch_size at a time.
+
+        Returns:
+            Number of quotes pushed to subscribers
+        """
+        now = self._clock()
+        # keyed by isin, a subscription may have been scheduled twice
+        due: Dict[str, Subscription] = {}
+        while (next_due := self.next_due()) is not None and next_due <= now:
+            _, isin = heapq.heappop(self._schedule)
+            due[isin] = self._subscriptions[isin]
+        batch = list(due.values())
+
+        pushed = 0
+        for offset in range(0, len(batch), self.batch_size):
+            if offset and self.stagger:
+                await self._sleep(self.stagger)
+            pushed += await self._poll_batch(batch[offset:offset + self.batch_size])
+        return pushed
+
+    async def run(self):
+        """
+        Polls until cancelled, sleeping until the next instrument is due.
+        New subscriptions wake the poller up.
+        """
+        self._wakeup = asyncio.Event()
+        while True:
+            self._wakeup.clear()
+            await self.poll()
+            due = self.next_due()
+            delay = self.interval if due is None else max(0.0, due - self._clock())
+            sleeper = asyncio.ensure_future(self._sleep(delay))
+            waker = asyncio.ensure_future(self._wakeup.wait())
+            try:
+                await asyncio.wait({sleeper, waker}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                sleeper.cancel()
+                waker.cancel()
+
+    def start(self) -> asyncio.Task:
+        """Runs the poller in a task of the running loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run())
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def _set_due(self, subscription: Subscription, due: float):
+        subscription.due = due
+        heapq.heappush(self._schedule, (due, subscription.isin))
+
+    async def _poll_batch(self, batch: List[Subscription]) -> int:
+        items = [subscription.instrument or subscription.isin for subscription in batch]
+        deliveries = []
+        async for result in self.api.request_instruments(items, concurrency=len(items)):
+            subscription = self._subscriptions.get(result.isin.upper())
+            if subscription is None:
+                # unsubscribed while requesting
+                continue
+            now = self._clock()
+            if not result.ok:
+                logger.debug(f"Polling {subscription.isin} failed: {str(result.error)}")
+                self._set_due(subscription, now + self.interval)
+                continue
+            instrument = subscription.instrument = result.instrument
+            self._set_due(subscription, max(now + self.interval, instrument.snapshot_valid_until.timestamp()))
+            quote = instrument.quote
+            if quote is None:
+                continue
+            key = quote_key(quote)
+            for callback, last in subscription.callbacks.items():
+                if last != key:
+                    subscription.callbacks[callback] = key
+                    deliveries.append(callback(quote))
+
+        for outcome in await asyncio.gather(*deliveries, return_exceptions=True):
+            if isinstance(outcome, Exception):
+                logger.warning(f"Quote subscriber failed: {str(outcome)}")
+        return len(deliveries)
@@ -0,0 +1,222 @@
+"""
+Schema of the snapshot response, for typed decoding with msgspec.
+
+The structs mirror only the sections and fields pyOnvista reads. Decoding into
+them skips everything else in the payload, and decode_snapshot turns the result
+back into the (pruned) dict layout the rest of the api works with. That second
+pass makes typed decoding about as fast as decoding the whole payload with
+orjson or msgspec; what it saves is memory, since only the pruned tree is kept
+per instrument, and the field types are validated.
+
+Every path of FIELD_MAP must be covered by the structs, see covers().
+
+msgspec is an optional dependency, install it to use typed decoding.
+"""
+import json as jsonlib
+import logging
+import typing
+from typing import (
+    Any,
+    Optional,
+    List,
+    Tuple,
+    Union
+)
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+logger = logging.getLogger(__name__)
+
+Number = Optional[Union[int, float, str]]
+
+if msgspec is not None:
+    class _Section(msgspec.Struct, omit_defaults=True):
+        """Missing fields stay missing when converted back to a dict"""
+
+    class Urls(_Section):
+        WEBSITE: Optional[str] = None
+
+    class InstrumentData(_Section):
+        entityValue: Optional[str] = None
+        entityType: Optional[str] = None
+        name: Optional[str] = None
+        isin: Optional[str] = None
+        wkn: Optional[str] = None
+        symbol: Optional[str] = None
+        urls: Optional[Urls] = None
+        expires: Number = None
+
+    class MarketData(_Section):
+        name: Optional[str] = None
+        codeExchange: Optional[str] = None
+        idNotation: Optional[Union[int, str]] = None
+
+    class QuoteData(_Section):
+        market: Optional[MarketData] = None
+        datetimeLast: Optional[str] = None
+        open: Number = None
+        high: Number = None
+        low: Number = None
+        last: Number = None
+        money: Number = None
+        totalMoney: Number = None
+        volume: Number = None
+        volumeBid: Number = None
+        performancePct: Number = None
+        performance1YearPct: Number = None
+
+    class QuoteList(_Section):
+        list: List[QuoteData] = []
+
+    class Sector(_Section):
+        name: Optional[str] = None
+
+    class Branch(_Section):
+        name: Optional[str] = None
+        sector: Optional[Sector] = None
+
+    class Company(_Section):
+        isoCountry: Optional[str] = None
+        nameCountry: Optional[str] = None
+        branch: Optional[Branch] = None
+
+    class StocksFigure(_Section):
+        marketCapInstrument: Number = None
+
+    class CnPerformance(_Section):
+        performanceRelD1: Number = None
+        performanceRelW1: Number = None
+        performanceRelM1: Number = None
+        performanceRelM3: Number = None
+        performanceRelW52: Number = None
+        performanceRelY3: Number = None
+        vola30: Number = None
+        vola250: Number = None
+
+    class StocksCnTechnical(_Section):
+        movingAverage5: Number = None
+        movingAverage20: Number = None
+        movingAverage30: Number = None
+        movingAverage100: Number = None
+        movingAverage200: Number = None
+        relativeStrengthIndexWilder20: Number = None
+
+    class FundamentalYear(_Section):
+        cnPer: Number = None
+        cnPriceBookvalue: Number = None
+        cnEpsAdj: Number = None
+        cnDivYield: Number = None
+
+    class FundamentalList(_Section):
+        list: List[FundamentalYear] = []
+
+    class FinancialYear(_Section):
+        cnReturnEquity: Number = None
+        cnDebtEquity: Number = None
+
+    class FinancialList(_Section):
+        list: List[FinancialYear] = []
+
+    class BalanceSheetYear(_Section):
+        eps: Number = None
+        employees: Number = None
+
+    class BalanceSheetList(_Section):
+        list: List[BalanceSheetYear] = []
+
+    class ClimateGroup(_Section):
+        climateScore: Number = None
+        renewableEnergyValue: Number = None
+
+    class SocietyGroup(_Section):
+        societyScore: Number = None
+
+    class GenderGroup(_Section):
+        genderScore: Number = None
+
+    class SustainabilityData(_Section):
+        totalScore: Number = None
+        climateGroup: Optional[ClimateGroup] = None
+        societyGroup: Optional[SocietyGroup] = None
+        genderGroup: Optional[GenderGroup] = None
+
+    class Snapshot(_Section):
+        instrument: Optional[InstrumentData] = None
+        quote: Optional[QuoteData] = None
+        quoteList: Optional[QuoteList] = None
+        company: Optional[Company] = None
+        stocksFigure: Optional[StocksFigure] = None
+        cnPerformance: Optional[CnPerformance] = None
+        stocksCnTechnical: Optional[StocksCnTechnical] = None
+        stocksCnFundamentalList: Optional[FundamentalList] = None
+        stocksCnFinancialList: Optional[FinancialList] = None
+        stocksBalanceSheetList: Optional[BalanceSheetList] = None
+        sustainabilityData: Optional[SustainabilityData] = None
+        expires: Number = None
+
+    _snapshot_decoder = msgspec.json.Decoder(Snapshot)
+
+
+def _require_msgspec():
+    if msgspec is None:
+        raise ImportError("Typed snapshot decoding requires msgspec to be installed")
+
+
+def _struct_of(annotation: Any) -> Any:
+    """The Struct or List type in an Optional annotation, None for leaf types"""
+    candidates = typing.get_args(annotation) if typing.get_origin(annotation) is Union else (annotation,)
+    for candidate in candidates:
+        if typing.get_origin(candidate) is list or (
+                isinstance(candidate, type) and issubclass(candidate, msgspec.Struct)):
+            return candidate
+    return None
+
+
+def covers(path: Tuple[Union[str, int], ...]) -> bool:
+    """
+    Whether the Snapshot struct keeps the value at path, e.g. a path of FIELD_MAP
+    parsed by fields.parse_path.
+    """
+    _require_msgspec()
+    node: Any = Snapshot
+    for position, key in enumerate(path):
+        if node is None:
+            return False
+        if isinstance(key, int):
+            if typing.get_origin(node) is not list:
+                return False
+            node = _struct_of(typing.get_args(node)[0])
+            # a list of leaf values
+            if node is None and position == len(path) - 1:
+                return True
+            continue
+        if typing.get_origin(node) is list or key not in node.__struct_fields__:
+            return False
+        annotation = typing.get_type_hints(node)[key]
+        node = _struct_of(annotation)
+    return True
+
+
+def decode_snapshot_struct(body: bytes) -> "Snapshot":
+    """
+    Decodes a snapshot response into the typed Snapshot struct.
+    """
+    _require_msgspec()
+    return _snapshot_decoder.decode(body)
+
+
+def decode_snapshot(body: bytes) -> dict:
+    """
+    Decodes a snapshot response, keeping only the fields pyOnvista reads.
+    Can be used wherever a json decoder is expected. A response not matching
+    the schema is decoded in full instead of failing.
+    """
+    _require_msgspec()
+    try:
+        return msgspec.to_builtins(_snapshot_decoder.decode(body))
+    except msgspec.ValidationError as e:
+        logger.warning(f"Snapshot does not match the schema ({e}), decoding it in full")
+        return jsonlib.loads(body)
@@ -0,0 +1,170 @@
+"""
+Columnar storage of historical quotes.
+
+A QuoteSeries keeps one array.array per field instead of one Quote object per
+bar. Rows are materialized as Quote only when accessed. If numpy is installed,
+the columns can be viewed as numpy arrays without copying.
+"""
+import array
+import datetime
+import math
+from typing import (
+    Any,
+    Optional,
+    Dict,
+    Iterable,
+    Iterator,
+    Union
+)
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - optional dependency
+    numpy = None
+
+COLUMNS = ("timestamp", "open", "high", "low", "close", "volume", "pieces")
+
+
+def bar_values(bar: tuple) -> list:
+    """
+    Converts a bar to the floats stored in the columns, missing values become NaN
+    :param bar: (timestamp, open, high, low, close, volume, pieces)
+    :return: list of floats
+    """
+    if len(bar) != len(COLUMNS):
+        raise ValueError(f"A bar has {len(COLUMNS)} values, got {len(bar)}")
+    return [math.nan if value is None else float(value) for value in bar]
+
+
+def _count(value: float) -> Optional[int]:
+    return None if math.isnan(value) else int(value)
+
+
+class QuoteSeries:
+    def __init__(self, resolution: str, instrument: Any = None, notation: Any = None,
+                 bars: Iterable[tuple] = ()):
+        """
+        Columns of historical quotes in chronological order.
+
+        Args:
+            resolution: Resolution of the bars, e.g. "15m"
+            instrument: Instrument the bars belong to
+            notation: Notation (market) the bars were requested for
+            bars: Tuples of (timestamp, open, high, low, close, volume, pieces)
+        """
+        self.resolution = resolution
+        self.instrument = instrument
+        self.notation = notation
+        self.timestamp = array.array("d")
+        self.open = array.array("d")
+        self.high = array.array("d")
+        self.low = array.array("d")
+        self.close = array.array("d")
+        self.volume = array.array("d")
+        self.pieces = array.array("d")
+        self.extend(bars)
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def __bool__(self) -> bool:
+        return len(self.timestamp) > 0
+
+    def __iter__(self) -> Iterator["Quote"]:
+        for index in range(len(self)):
+            yield self._row(index)
+
+    def __getitem__(self, item: Union[int, slice]) -> Union["Quote", "QuoteSeries"]:
+        if isinstance(item, slice):
+            series = QuoteSeries(self.resolution, self.instrument, self.notation)
+            for name in COLUMNS:
+                getattr(series, name).extend(getattr(self, name)[item])
+            return series
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError("QuoteSeries index out of range")
+        return self._row(item)
+
+    def __repr__(self) -> str:
+        return f"QuoteSeries(resolution={self.resolution!r}, len={len(self)})"
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the columns"""
+        return sum(column.itemsize * len(column) for column in self.columns.values())
+
+    @property
+    def columns(self) -> Dict[str, array.array]:
+        return {name: getattr(self, name) for name in COLUMNS}
+
+    @property
+    def last_timestamp(self) -> Optional[datetime.datetime]:
+        return datetime.datetime.fromtimestamp(self.timestamp[-1]) if self else None
+
+    def append(self, bar: tuple):
+        """
+        Appends a (timestamp, open, high, low, close, volume, pieces) tuple.
+        The bar is converted before any column is touched, so an invalid bar
+        leaves the series unchanged.
+        """
+        for name, value in zip(COLUMNS, bar_values(bar)):
+            getattr(self, name).append(value)
+
+    def extend(self, bars: Iterable[tuple]):
+        for bar in bars:
+            self.append(bar)
+
+    def merge_tail(self, bars: Iterable[tuple]) -> int:
+        """
+        Merges bars requested from the last timestamp onward, in chronological order.
+        A bar at the last timestamp replaces the last row, since the final bar
+        may have been revised. Later bars are appended, earlier ones are ignored.
+
+        Returns:
+            Number of bars appended
+        """
+        last = self.timestamp[-1] if self else float("-inf")
+        appended = 0
+        for bar in bars:
+            if bar[0] > last:
+                self.append(bar)
+                last = bar[0]
+                appended += 1
+            elif bar[0] == last and not appended:
+                for name, value in zip(COLUMNS, bar_values(bar)):
+                    getattr(self, name)[-1] = value
+        return appended
+
+    def to_numpy(self, copy: bool = True) -> Dict[str, Any]:
+        """
+        Returns the columns as numpy arrays.
+
+        Args:
+            copy: Copy the columns (default). Without copying, the arrays share
+                memory with the series, which can then not grow (append,
+                merge_tail, PyOnVista.update_quotes raise BufferError) until
+                all of them are released.
+        """
+        if numpy is None:
+            raise ImportError("to_numpy requires numpy to be installed")
+        if copy:
+            return {name: numpy.array(column, dtype=numpy.float64) for name, column in self.columns.items()}
+        return {name: numpy.frombuffer(column, dtype=numpy.float64) for name, column in self.columns.items()}
+
+    def to_quotes(self) -> list:
+        return list(self)
+
+    def _row(self, index: int) -> "Quote":
+        from .api import Quote
+        return Quote(
+            self.resolution,
+            datetime.datetime.fromtimestamp(self.timestamp[index]),
+            self.open[index],
+            self.high[index],
+            self.low[index],
+            self.close[index],
+            _count(self.volume[index]),
+            _count(self.pieces[index]),
+            self.instrument
+        )
@@ -0,0 +1,107 @@
+"""
+Columnar extraction of fundamentals for many instruments.
+
+A FundamentalsTable holds one column per field of the dataclasses returned by
+the get_* methods (the keys of FIELD_MAP) plus the isin, symbol and name of
+each instrument. Values are taken from the memoized get_* results, so fields
+without an entry in FIELD_MAP are included as well. Float fields are kept in
+array.array("d") columns, missing values as NaN. If pandas or pyarrow are installed, the table converts to a
+DataFrame or an arrow Table.
+"""
+import array
+import dataclasses
+import math
+import typing
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Union
+)
+
+from .api import FIELD_MAP, Instrument
+
+try:
+    import pandas
+except ImportError:  # pragma: no cover - optional dependency
+    pandas = None
+
+try:
+    import pyarrow
+except ImportError:  # pragma: no cover - optional dependency
+    pyarrow = None
+
+KEY_COLUMNS = ("isin", "symbol", "name")
+
+Column = Union[array.array, List[Any]]
+
+
+class FundamentalsTable:
+    def __init__(self, classes: Optional[Iterable[type]] = None):
+        """
+        Empty table with the columns of the given get_* dataclasses.
+
+        Args:
+            classes: Dataclasses returned by the get_* methods to include, e.g. [FinancialRatios]
+                (default: all of them)
+        """
+        self.classes = tuple(classes if classes is not None else FIELD_MAP)
+        self._fields = [(cls, tuple(field.name for field in dataclasses.fields(cls))) for cls in self.classes]
+        self.columns: Dict[str, Column] = {name: [] for name in KEY_COLUMNS}
+        for cls, names in self._fields:
+            hints = typing.get_type_hints(cls)
+            for name in names:
+                if name in self.columns:
+                    raise ValueError(f"Column {name} of {cls.__name__} is not unique")
+                self.columns[name] = array.array("d") if hints[name] == Optional[float] else []
+
+    @classmethod
+    def from_instruments(cls, instruments: Iterable[Instrument],
+                         classes: Optional[Iterable[type]] = None) -> "FundamentalsTable":
+        """
+        Extracts the fundamentals of instruments in a single pass, one row each.
+        Results memoized by the get_* methods are reused.
+        """
+        table = cls(classes)
+        for instrument in instruments:
+            table.append(instrument)
+        return table
+
+    def __len__(self) -> int:
+        return len(self.columns["isin"])
+
+    def __getitem__(self, column: str) -> Column:
+        return self.columns[column]
+
+    def __repr__(self) -> str:
+        return f"FundamentalsTable(rows={len(self)}, columns={len(self.columns)})"
+
+    def append(self, instrument: Instrument):
+        columns = self.columns
+        for name in KEY_COLUMNS:
+            columns[name].append(getattr(instrument, name))
+        for cls, names in self._fields:
+            result = instrument._extract(cls, shared=True)
+            for name in names:
+                value = getattr(result, name)
+                column = columns[name]
+                if column.__class__ is array.array:
+                    column.append(math.nan if value is None else value)
+                else:
+                    column.append(value)
+
+    def to_pandas(self) -> "pandas.DataFrame":
+        """Returns the table as a DataFrame indexed by isin"""
+        if pandas is None:
+            raise ImportError("to_pandas requires pandas to be installed")
+        return pandas.DataFrame(self.columns).set_index("isin")
+
+    def to_arrow(self) -> "pyarrow.Table":
+        """Returns the table as an arrow Table, missing values become nulls"""
+        if pyarrow is None:
+            raise ImportError("to_arrow requires pyarrow to be installed")
+        return pyarrow.table({
+            name: pyarrow.array(column, from_pandas=True) for name, column in self.columns.items()
+        })
@@ -0,0 +1,277 @@
+"""
+Transport layer for the onvista api.
+
+Bundles a tuned connection pool, a bound on the number of requests in flight
+and a rate limiter, so that calls issued concurrently (e.g. via asyncio.gather)
+actually overlap on the wire instead of being serialized.
+"""
+import asyncio
+import dataclasses
+import logging
+import time
+from typing import (
+    Any,
+    Callable,
+    Optional,
+    Union,
+    Dict,
+    Tuple
+)
+
+import aiohttp
+
+from .decoder import Decoder, get_decoder
+
+logger = logging.getLogger(__name__)
+
+
+def create_connector(
+        limit: int = 100,
+        limit_per_host: int = 20,
+        keepalive_timeout: float = 30.0,
+        ttl_dns_cache: int = 300
+) -> aiohttp.TCPConnector:
+    """
+    Creates a connector tuned for many small json requests against one host.
+
+    Args:
+        limit: Maximum number of open connections in total
+        limit_per_host: Maximum number of open connections to a single host
+        keepalive_timeout: Seconds an idle connection is kept for reuse
+        ttl_dns_cache: Seconds a resolved host address is cached
+
+    Returns:
+        aiohttp.TCPConnector
+    """
+    return aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        keepalive_timeout=keepalive_timeout,
+        use_dns_cache=True,
+        ttl_dns_cache=ttl_dns_cache,
+    )
+
+
+def create_session(connector: Optional[aiohttp.BaseConnector] = None, **kwargs) -> aiohttp.ClientSession:
+    """
+    Creates a client session on top of a tuned connector.
+
+    Args:
+        connector: Connector to use (default: create_connector())
+        **kwargs: Additional keyword arguments for aiohttp.ClientSession
+
+    Returns:
+        aiohttp.ClientSession owning the connector
+    """
+    return aiohttp.ClientSession(connector=connector or create_connector(), **kwargs)
+
+
+@dataclasses.dataclass
+class RateLimiterStats:
+    """Counters of a rate limiter, shared by all clients using it."""
+    acquired: int = 0
+    delayed: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    @property
+    def mean_wait(self) -> float:
+        return self.total_wait / self.acquired if self.acquired else 0.0
+
+    def record(self, wait: float):
+        self.acquired += 1
+        if wait > 0:
+            self.delayed += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+
+class RateLimiter:
+    """
+    Spaces requests at least `interval` seconds apart.
+
+    The next free slot is reserved before awaiting, so concurrent callers
+    never read the same timestamp and all of them end up properly spaced.
+    """
+    def __init__(self, interval: float = 0.1, clock: Callable[[], float] = time.monotonic):
+        self.interval = max(0.0, interval)
+        self.stats = RateLimiterStats()
+        self._clock = clock
+        self._next_slot = 0.0
+
+    async def acquire(self):
+        now = self._clock()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        delay = slot - now
+        self.stats.record(delay)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def penalize(self, seconds: float):
+        """Delays all further requests by at least seconds, e.g. after a 429 response."""
+        self._next_slot = max(self._next_slot, self._clock() + seconds)
+
+
+class TokenBucket:
+    """
+    Token bucket allowing bursts of up to `capacity` requests and a sustained
+    `rate` of requests per second.
+
+    A bucket holds no loop bound state, so one instance can be passed to
+    several PyOnVista clients to enforce a process wide limit. Tokens are
+    taken before awaiting; the level goes negative while callers wait for
+    their reserved tokens, which keeps concurrent callers in arrival order.
+    """
+    def __init__(self, rate: float, capacity: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.rate = rate
+        self.capacity = capacity
+        self.stats = RateLimiterStats()
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def fill_level(self) -> float:
+        """Tokens currently available for immediate requests."""
+        self._refill()
+        return max(0.0, self._tokens)
+
+    @property
+    def wait_time(self) -> float:
+        """Seconds a request issued now would have to wait."""
+        self._refill()
+        return max(0.0, (1 - self._tokens) / self.rate)
+
+    async def acquire(self, tokens: float = 1.0):
+        self._refill()
+        self._tokens -= tokens
+        delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        self.stats.record(delay)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def penalize(self, seconds: float):
+        """Drains the bucket so that no request passes for at least seconds."""
+        self._refill()
+        self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+
+class Transport:
+    def __init__(
+            self,
+            client: Any,
+            max_in_flight: int = 10,
+            rate_limiter: Optional[Union[RateLimiter, TokenBucket]] = None,
+            timeout: int = 30,
+            max_retries: int = 1,
+            retry_delay: float = 1.0,
+            decoder: Union[str, Decoder, None] = None
+    ):
+        """
+        Executes json requests on behalf of PyOnVista.
+
+        Args:
+            client: An installed async client (e.g. aiohttp.ClientSession)
+            max_in_flight: Maximum number of concurrent requests (default: 10)
+            rate_limiter: Limiter to acquire before each request (default: none)
+            timeout: Request timeout in seconds (default: 30s)
+            max_retries: Retries after a 429 response (default: 1)
+            retry_delay: Seconds to back off after a 429 response (default: 1s).
+                The back off is applied to the rate limiter, so every client
+                sharing it slows down.
+            decoder: JSON decoder name or callable taking bytes, see
+                decoder.get_decoder (default: fastest installed)
+        """
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.client = client
+        self.max_in_flight = max_in_flight
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.decoder = get_decoder(decoder)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # created lazily so that it binds to the running loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        return self._semaphore
+
+    async def get_json(self, url: str, *args, decoder: Optional[Decoder] = None, **kwargs) -> Optional[Dict]:
+        """
+        Fetches json from url while holding a slot of the in-flight bound.
+
+        Args:
+            url: URL to fetch
+            *args: Additional arguments for the client
+            decoder: Decoder for this response (default: self.decoder)
+            **kwargs: Additional keyword arguments for the client
+
+        Returns:
+            Dict containing JSON response or None if failed
+        """
+        data, _ = await self.get_json_sized(url, *args, decoder=decoder, **kwargs)
+        return data
+
+    async def get_json_sized(self, url: str, *args, decoder: Optional[Decoder] = None,
+                             **kwargs) -> Tuple[Optional[Dict], int]:
+        """
+        Like get_json, also returning the size of the response body in bytes,
+        e.g. to account for the response in a cache without serializing it again.
+
+        Returns:
+            Tuple of the decoded json (None if failed) and the body size (0 if failed)
+        """
+        for attempt in range(self.max_retries + 1):
+            async with self.semaphore:
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.acquire()
+                status, data, size = await self._fetch(url, *args, decoder=decoder, **kwargs)
+            if status != 429:
+                return data, size
+            if attempt < self.max_retries:
+                logger.warning(f"Rate limited, waiting longer for URL: {url}")
+                if self.rate_limiter is not None:
+                    self.rate_limiter.penalize(self.retry_delay)
+                else:
+                    # back off outside the semaphore, so other requests may proceed
+                    await asyncio.sleep(self.retry_delay)
+        logger.warning(f"Rate limited, giving up on URL: {url}")
+        return None, 0
+
+    async def _fetch(self, url: str, *args, decoder: Optional[Decoder] = None,
+                     **kwargs) -> Tuple[Optional[int], Optional[Dict], int]:
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            timeout = aiohttp.ClientTimeout(total=self.timeout)
+            async with self.client.get(url, timeout=timeout, *args, **kwargs) as response:
+                if response.status == 200:
+                    body = await response.read()
+                    return response.status, (decoder or self.decoder)(body), len(body)
+                if response.status != 429:
+                    logger.warning(f"HTTP {response.status} for URL: {url}")
+                return response.status, None, 0
+        except asyncio.TimeoutError:
+            logger.error(f"Timeout for URL: {url}")
+            return None, None, 0
+        except Exception as e:
+            logger.error(f"Error fetching {url}: {str(e)}")
+            return None, None, 0
+        finally:
+            self.in_flight -= 1
@@ -0,0 +1,114 @@
+"""
+Read-only attribute views of json trees, used by Instrument.as_tree.
+
+A TreeView wraps a dict without copying it. Nested dicts and lists are wrapped
+only when accessed, and each wrapper is created once per view. Lists become
+TreeList sequences, which compare equal to lists of the same items.
+"""
+import collections.abc
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Union
+)
+
+
+def wrap(value: Any) -> Any:
+    """Wraps dicts and lists into views, other values are returned as they are"""
+    if isinstance(value, dict):
+        return TreeView(value)
+    if isinstance(value, list):
+        return TreeList(value)
+    return value
+
+
+class TreeView:
+    """Attribute access to the keys of a dict, e.g. view.company.branch.name"""
+    __slots__ = ("_data", "_children")
+
+    def __init__(self, data: dict):
+        object.__setattr__(self, "_data", data)
+        object.__setattr__(self, "_children", {})
+
+    def __getattr__(self, name: str) -> Any:
+        children: Dict[str, Any] = self._children
+        if name in children:
+            return children[name]
+        try:
+            value = self._data[name]
+        except KeyError:
+            raise AttributeError(f"No field {name!r} in tree") from None
+        if isinstance(value, (dict, list)):
+            value = children[name] = wrap(value)
+        return value
+
+    def __setattr__(self, name: str, value: Any):
+        # the wrapped dict may be shared, e.g. by a snapshot cache
+        raise AttributeError("Tree views are read-only")
+
+    def __delattr__(self, name: str):
+        raise AttributeError("Tree views are read-only")
+
+    def __dir__(self) -> List[str]:
+        return list(self._data)
+
+    def __reduce__(self):
+        return TreeView, (self._data,)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, TreeView):
+            return self._data == other._data
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"TreeView({self._data!r})"
+
+
+class TreeList(collections.abc.Sequence):
+    """Sequence view of a json list, wrapping its items on access"""
+    __slots__ = ("_data", "_items")
+
+    def __init__(self, data: list):
+        self._data = data
+        self._items: Dict[int, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return TreeList(self._data[index])
+        if index < 0:
+            index += len(self._data)
+            if index < 0:
+                raise IndexError("list index out of range")
+        if index in self._items:
+            return self._items[index]
+        value = self._data[index]
+        if isinstance(value, (dict, list)):
+            value = self._items[index] = wrap(value)
+        return value
+
+    def __iter__(self) -> Iterator[Any]:
+        for index in range(len(self._data)):
+            yield self[index]
+
+    def __reduce__(self):
+        return TreeList, (self._data,)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, TreeList):
+            return self._data == other._data
+        if isinstance(other, list):
+            # as_tree returned plain lists before
+            return len(self) == len(other) and all(mine == theirs for mine, theirs in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"TreeList({self._data!r})"
@@ -1,7 +1,12 @@
 """
 Some util function implemented here
 """
+import re
+import sys
 import urllib.parse
+from typing import List
+
+_TOKEN = re.compile(r"[^\W_]+")
 
 def make_url(base_url , *res, **params):
     url = base_url
@@ -9,4 +14,33 @@ def make_url(base_url , *res, **params):
         url = '{}/{}'.format(url, r)
     if params:
         url = '{}?{}'.format(url, urllib.parse.urlencode(params))
-    return url
\ No newline at end of file
+    return url
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower case alphanumeric tokens of text, shared by the search cache and the index"""
+    return _TOKEN.findall(text.lower())
+
+
+def deep_sizeof(value) -> int:
+    """
+    Bytes held in memory by a json tree, or by dataclasses holding json values.
+    Objects referenced twice are counted once.
+    """
+    seen = set()
+    size = 0
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        if id(value) in seen:
+            continue
+        seen.add(id(value))
+        size += sys.getsizeof(value)
+        if isinstance(value, dict):
+            stack.extend(value.keys())
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif hasattr(value, "__dict__") and not isinstance(value, type):
+            stack.append(value.__dict__)
+    return size
@@ -1,11 +1,161 @@
+import asyncio
+import datetime
+import json
+import time
+
 import pytest
 import aiohttp
-import shelve
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from collections import Counter
 from pathlib import Path
 
 from src.pyonvista.api import PyOnVista, Instrument
+from src.pyonvista.cache import SQLiteCache
+
+ASSETS = Path(__file__).parent / "assets"
+
+CHART_STEPS = {"1m": 60, "15m": 900, "1D": None}
+
+
+class FakeClock:
+    """A clock for the clock and sleep arguments, time only passes when set or slept"""
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+        self.slept = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float):
+        self.slept.append(seconds)
+        self.now += seconds
+        await asyncio.sleep(0)
+
+
+def load_asset(name: str) -> dict:
+    with open(ASSETS / name) as f:
+        return json.load(f)
+
+
+def make_chart_history(start: datetime.date, end: datetime.date, resolution: str) -> dict:
+    """
+    Synthesizes a deterministic chart_history response with one bar per step
+    during trading hours of each weekday in [start, end].
+    """
+    columns = {key: [] for key in ("datetimeLast", "first", "last", "high", "low", "volume", "numberPrices")}
+    step = CHART_STEPS[resolution]
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            opening = datetime.datetime.combine(day, datetime.time(9, 0)).timestamp()
+            closing = datetime.datetime.combine(day, datetime.time(17, 30)).timestamp()
+            stamps = range(int(opening), int(closing), step) if step else [int(closing)]
+            for stamp in stamps:
+                price = 100 + (stamp // 60 % 1000) / 100
+                columns["datetimeLast"].append(stamp)
+                columns["first"].append(price)
+                columns["last"].append(price + 0.05)
+                columns["high"].append(price + 0.1)
+                columns["low"].append(price - 0.1)
+                columns["volume"].append(stamp % 997)
+                columns["numberPrices"].append(stamp % 13)
+        day += datetime.timedelta(days=1)
+    return columns
+
+
+def _search_entries() -> list:
+    entries = {}
+    for path in sorted(ASSETS.glob("search_*.json")):
+        for facet in load_asset(path.name)["facets"]:
+            for result in facet["results"]:
+                entries.setdefault(result["isin"], result)
+    for path in sorted(ASSETS.glob("snapshot_*.json")):
+        instrument = load_asset(path.name)["instrument"]
+        entries.setdefault(instrument["isin"], instrument)
+    return list(entries.values())
+
+
+class OnVistaStub:
+    """
+    A local stand-in for the onvista api replaying the json in test/assets.
+
+    hits counts requests per path and query, delay delays every response,
+    status forces a status code per path, failing_chunks the status 500 for
+    chart_history requests starting at the given dates and peak_in_flight
+    records the highest concurrency seen by the server.
+    """
+    def __init__(self):
+        self.hits = Counter()
+        self.delay = 0.0
+        self.status = {}
+        self.failing_chunks = set()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.entries = _search_entries()
+        self.snapshots = {
+            path.stem.split("_", 1)[1]: path.read_bytes() for path in ASSETS.glob("snapshot_*.json")
+        }
+        self.app = web.Application(middlewares=[self.bookkeeping])
+        self.app.router.add_get("/api/v1/{type}/ISIN:{isin}/snapshot", self.snapshot)
+        self.app.router.add_get("/api/v1/instruments/search/facet", self.search)
+        self.app.router.add_get("/api/v1/instruments/{type}/{uid}/chart_history", self.chart_history)
+        self.server = TestServer(self.app)
+
+    @property
+    def api_base(self) -> str:
+        return str(self.make_url("/api/v1"))
 
-INSTRUMENT_DB = Path(__file__).parent / "assets" / "instruments_for_test"
+    def make_url(self, path: str):
+        return self.server.make_url(path)
+
+    def add_snapshot(self, isin: str, based_on: str = "DE0007664039") -> str:
+        """Serves a copy of the snapshot of based_on under a new isin and uid"""
+        snapshot = json.loads(self.snapshots[based_on])
+        snapshot["instrument"]["isin"] = isin
+        snapshot["instrument"]["entityValue"] = f"{snapshot['instrument']['entityValue']}-{isin}"
+        self.snapshots[isin] = json.dumps(snapshot).encode()
+        return isin
+
+    @web.middleware
+    async def bookkeeping(self, request, handler):
+        self.hits[request.path_qs] += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            if status := self.status.get(request.path):
+                return web.json_response({}, status=status)
+            return await handler(request)
+        finally:
+            self.in_flight -= 1
+
+    async def snapshot(self, request):
+        body = self.snapshots.get(request.match_info["isin"])
+        if body is None:
+            raise web.HTTPNotFound()
+        return web.Response(body=body, content_type="application/json")
+
+    async def search(self, request):
+        value = request.query["searchValue"].lower()
+        per_type = int(request.query.get("perType", 100))
+        facets = {}
+        for entry in self.entries:
+            haystack = " ".join(str(entry.get(key, "")) for key in ("name", "isin", "wkn", "symbol"))
+            if value in haystack.lower():
+                facets.setdefault(entry["entityType"], []).append(entry)
+        return web.json_response({"facets": [
+            {"type": type_, "total": len(results), "results": results[:per_type]}
+            for type_, results in facets.items()
+        ]})
+
+    async def chart_history(self, request):
+        if request.query["startDate"] in self.failing_chunks:
+            raise web.HTTPInternalServerError()
+        start = datetime.date.fromisoformat(request.query["startDate"])
+        end = datetime.date.fromisoformat(request.query["endDate"])
+        return web.json_response(make_chart_history(start, end, request.query["resolution"]))
 
 
 @pytest.fixture()
@@ -23,12 +173,34 @@ async def onvista_api(aio_client) -> PyOnVista:
 
 
 @pytest.fixture()
-def instrument_vw() -> Instrument:
-    with shelve.open(str(INSTRUMENT_DB)) as db:
-        return db["DE0007664039"]
+async def onvista_server() -> OnVistaStub:
+    stub = OnVistaStub()
+    await stub.server.start_server()
+    yield stub
+    await stub.server.close()
+
+
+@pytest.fixture()
+async def local_api(onvista_server, aio_client) -> PyOnVista:
+    api = PyOnVista(request_delay=0, api_base=onvista_server.api_base)
+    await api.install_client(aio_client)
+    return api
+
+
+@pytest.fixture()
+def snapshot_db(tmp_path) -> SQLiteCache:
+    """A persistent snapshot cache seeded with the snapshots in test/assets, keyed by isin"""
+    with SQLiteCache(tmp_path / "snapshots.sqlite") as db:
+        for path in ASSETS.glob("snapshot_*.json"):
+            db.set(path.stem.split("_", 1)[1], load_asset(path.name), expires=time.time() + 3600)
+        yield db
+
+
+@pytest.fixture()
+def instrument_vw(snapshot_db) -> Instrument:
+    return Instrument.from_snapshot(snapshot_db.get("DE0007664039"))
 
 
 @pytest.fixture()
-def instrument_etf() -> Instrument:
-    with shelve.open(str(INSTRUMENT_DB)) as db:
-        return db['IE00B42NKQ00']
+def instrument_etf(snapshot_db) -> Instrument:
+    return Instrument.from_snapshot(snapshot_db.get("IE00B42NKQ00"))
@@ -1,9 +1,6 @@
-import shelve
-
 import pytest
 
 from src.pyonvista.api import PyOnVista, Instrument
-from conftest import INSTRUMENT_DB
 
 
 class TestPyOnVista:
@@ -22,9 +19,6 @@ class TestPyOnVista:
         async with aio_client:
             instrument = (await onvista_api.search_instrument("vw"))[0]
         assert instrument.name == "Volkswagen (VW) Vz"
-        # update instrument test db here
-        with shelve.open(str(INSTRUMENT_DB)) as db:
-            db[instrument.isin] = instrument
 
     @pytest.mark.asyncio
     async def test_request_instrument(self, onvista_api, aio_client, instrument_vw):
@@ -37,9 +31,6 @@ class TestPyOnVista:
         async with aio_client:
             instrument = (await onvista_api.search_instrument("IE00B42NKQ00"))[0]
         assert instrument.uid == "99206463"
-        # update instrument test db here
-        with shelve.open(str(INSTRUMENT_DB)) as db:
-            db[instrument.isin] = instrument
 
     @pytest.mark.asyncio
     async def test_request_quotes(self, onvista_api: PyOnVista, instrument_vw, aio_client):
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from src.pyonvista.api import PyOnVista, Instrument, BatchResult
+
+
+class TestRequestInstruments:
+    @pytest.mark.asyncio
+    async def test_mixed_items(self, local_api: PyOnVista):
+        existing = Instrument(isin="IE00B42NKQ00", type="FUND")
+        results = [r async for r in local_api.request_instruments(["DE0007664039", existing])]
+        assert {r.isin for r in results} == {"DE0007664039", "IE00B42NKQ00"}
+        assert all(r.ok for r in results)
+        by_isin = {r.isin: r.instrument for r in results}
+        assert by_isin["IE00B42NKQ00"] is existing
+        assert by_isin["DE0007664039"].name == "Volkswagen (VW) Vz"
+
+    @pytest.mark.asyncio
+    async def test_matches_single_item_path(self, local_api: PyOnVista):
+        single = await local_api.request_instrument(isin="DE0007664039")
+        batched = [r async for r in local_api.request_instruments(["DE0007664039"])][0].instrument
+        assert batched.uid == single.uid
+        assert (batched.quote.timestamp, batched.quote.close) == (single.quote.timestamp, single.quote.close)
+        assert batched.notations == single.notations
+        assert batched.get_financial_ratios() == single.get_financial_ratios()
+
+    @pytest.mark.asyncio
+    async def test_failures_do_not_abort(self, local_api: PyOnVista):
+        isins = ["DE0007664039", "XX0000000000", "IE00B42NKQ00"]
+        results = [r async for r in local_api.request_instruments(isins, concurrency=2)]
+        assert len(results) == 3
+        failed = [r for r in results if not r.ok]
+        assert [r.isin for r in failed] == ["XX0000000000"]
+        assert isinstance(failed[0].error, ValueError)
+        assert failed[0].instrument is None
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self, local_api: PyOnVista, onvista_server):
+        onvista_server.delay = 0.02
+        isins = [onvista_server.add_snapshot(f"DE000000000{i}") for i in range(8)]
+        results = [r async for r in local_api.request_instruments(isins, concurrency=3)]
+        assert len(results) == 8
+        assert 1 < onvista_server.peak_in_flight <= 3
+
+    @pytest.mark.asyncio
+    async def test_early_exit_cancels_workers(self, local_api: PyOnVista):
+        batch = local_api.request_instruments(["DE0007664039"] * 20, concurrency=2)
+        async for result in batch:
+            assert isinstance(result, BatchResult)
+            break
+        await batch.aclose()
+        await asyncio.sleep(0)
+
+    @pytest.mark.asyncio
+    async def test_invalid_concurrency(self, local_api: PyOnVista):
+        with pytest.raises(ValueError):
+            async for _ in local_api.request_instruments(["DE0007664039"], concurrency=0):
+                pass
+
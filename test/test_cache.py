@@ -0,0 +1,177 @@
+import datetime
+import sqlite3
+import zlib
+
+import pytest
+
+from src.pyonvista.api import PyOnVista, Instrument
+from src.pyonvista import cache as cache_module
+from src.pyonvista.cache import SnapshotCache, SQLiteCache, payload_size
+
+from conftest import FakeClock
+
+SNAPSHOT_PATH = "/api/v1/stocks/ISIN:DE0007664039/snapshot"
+
+
+class TestSnapshotCache:
+    def test_hit_and_miss(self):
+        cache = SnapshotCache(clock=FakeClock())
+        assert cache.get("a") is None
+        cache.set("a", {"x": 1}, expires=2000)
+        assert cache.get("a") == {"x": 1}
+        assert "a" in cache
+        assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+        assert cache.stats.hit_ratio == 0.5
+
+    def test_expiry(self):
+        clock = FakeClock()
+        cache = SnapshotCache(clock=clock)
+        cache.set("a", {"x": 1}, expires=1500)
+        clock.now = 1500
+        assert cache.get("a") is None
+        assert cache.stats.expirations == 1
+        assert len(cache) == 0
+        assert cache.current_bytes == 0
+
+    def test_already_expired_is_not_stored(self):
+        cache = SnapshotCache(clock=FakeClock())
+        cache.set("a", {"x": 1}, expires=10)
+        assert len(cache) == 0
+
+    def test_lru_eviction_by_bytes(self):
+        value = {"payload": "x" * 100}
+        size = payload_size(value)
+        cache = SnapshotCache(max_bytes=size * 2, clock=FakeClock())
+        cache.set("a", value, expires=2000)
+        cache.set("b", value, expires=2000)
+        cache.get("a")
+        cache.set("c", value, expires=2000)
+        assert "a" in cache and "c" in cache
+        assert "b" not in cache
+        assert cache.stats.evictions == 1
+        assert cache.current_bytes == size * 2
+
+    def test_lru_eviction_by_entries(self):
+        cache = SnapshotCache(max_entries=1, clock=FakeClock())
+        cache.set("a", {}, expires=2000)
+        cache.set("b", {}, expires=2000)
+        assert len(cache) == 1 and "b" in cache
+
+    def test_replace_and_oversized(self):
+        cache = SnapshotCache(max_bytes=100, clock=FakeClock())
+        cache.set("a", {}, expires=2000, size=10)
+        cache.set("a", {}, expires=2000, size=20)
+        assert cache.current_bytes == 20
+        cache.set("a", {}, expires=2000, size=200)
+        assert len(cache) == 0 and cache.current_bytes == 0
+
+
+class TestCachedRequestInstrument:
+    @pytest.mark.asyncio
+    async def test_served_until_expiry(self, onvista_server, aio_client):
+        clock = FakeClock(now=datetime.datetime(2024, 5, 17).timestamp())
+        cache = SnapshotCache(clock=clock)
+        api = PyOnVista(request_delay=0, api_base=onvista_server.api_base, snapshot_cache=cache)
+        await api.install_client(aio_client)
+
+        first = await api.request_instrument(isin="DE0007664039")
+        second = await api.request_instrument(isin="DE0007664039")
+        assert onvista_server.hits[SNAPSHOT_PATH] == 1
+        assert second.get_financial_ratios() == first.get_financial_ratios()
+        assert second.snapshot_valid_until.timestamp() > clock.now
+        assert cache.stats.hits == 1
+
+        clock.now = first.snapshot_valid_until.timestamp()
+        await api.request_instrument(isin="DE0007664039")
+        assert onvista_server.hits[SNAPSHOT_PATH] == 2
+
+    @pytest.mark.asyncio
+    async def test_size_is_the_body_length(self, onvista_server, aio_client, monkeypatch):
+        def serialize(value):
+            raise AssertionError("the response should not be serialized again")
+
+        monkeypatch.setattr(cache_module, "payload_size", serialize)
+        cache = SnapshotCache()
+        api = PyOnVista(request_delay=0, api_base=onvista_server.api_base, snapshot_cache=cache)
+        await api.install_client(aio_client)
+        await api.request_instrument(isin="DE0007664039")
+        assert cache.current_bytes == len(onvista_server.snapshots["DE0007664039"])
+
+    @pytest.mark.asyncio
+    async def test_refresh_does_not_duplicate_notations(self, onvista_server, aio_client):
+        api = PyOnVista(request_delay=0, api_base=onvista_server.api_base, snapshot_cache=SnapshotCache())
+        await api.install_client(aio_client)
+        instrument = await api.request_instrument(isin="DE0007664039")
+        notations = list(instrument.notations)
+        await api.request_instrument(instrument)
+        assert instrument.notations == notations
+
+
+class TestSQLiteCache:
+    def test_roundtrip_survives_reopen(self, tmp_path):
+        path = tmp_path / "cache.sqlite"
+        with SQLiteCache(path, clock=FakeClock()) as cache:
+            cache.set("a", {"x": [1, 2, 3]}, expires=2000)
+        with SQLiteCache(path, clock=FakeClock()) as cache:
+            assert cache.get("a") == {"x": [1, 2, 3]}
+            assert len(cache) == 1
+            assert cache.stats.hits == 1
+
+    def test_wal_and_compression(self, tmp_path):
+        path = tmp_path / "cache.sqlite"
+        value = {"payload": "abc" * 1000}
+        with SQLiteCache(path, clock=FakeClock()) as cache:
+            cache.set("a", value, expires=2000)
+            assert cache._db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        db = sqlite3.connect(str(path))
+        payload = db.execute("SELECT payload FROM responses").fetchone()[0]
+        db.close()
+        assert len(payload) < payload_size(value) / 10
+        assert zlib.decompress(payload)
+
+    def test_expiry_and_purge(self, tmp_path):
+        clock = FakeClock()
+        with SQLiteCache(tmp_path / "cache.sqlite", clock=clock) as cache:
+            cache.set("a", {}, expires=1500)
+            cache.set("b", {}, expires=2500)
+            cache.set("c", {}, expires=10)
+            assert len(cache) == 2
+            clock.now = 1600
+            assert "a" not in cache
+            assert cache.get("a") is None
+            assert cache.stats.expirations == 1
+            clock.now = 3000
+            assert cache.purge_expired() == 1
+            assert len(cache) == 0
+
+    def test_seeded_fixture(self, snapshot_db, instrument_vw: Instrument):
+        assert instrument_vw.isin == "DE0007664039"
+        assert instrument_vw.notations
+        assert instrument_vw.get_financial_ratios().pe_ratio == 3.91
+
+    @pytest.mark.asyncio
+    async def test_shared_by_restarted_clients(self, tmp_path, onvista_server, aio_client):
+        path = tmp_path / "cache.sqlite"
+        clock = FakeClock(now=datetime.datetime(2024, 5, 17).timestamp())
+        for _ in range(2):
+            with SQLiteCache(path, clock=clock) as cache:
+                api = PyOnVista(request_delay=0, api_base=onvista_server.api_base, snapshot_cache=cache)
+                await api.install_client(aio_client)
+                instrument = await api.request_instrument(isin="DE0007664039")
+                assert instrument.name == "Volkswagen (VW) Vz"
+        assert onvista_server.hits[SNAPSHOT_PATH] == 1
+
+
+class TestChartCache:
+    @pytest.mark.asyncio
+    async def test_chart_history_is_cached(self, tmp_path, onvista_server, aio_client, instrument_vw):
+        with SQLiteCache(tmp_path / "charts.sqlite") as cache:
+            api = PyOnVista(request_delay=0, api_base=onvista_server.api_base, chart_cache=cache)
+            await api.install_client(aio_client)
+            start, end = datetime.datetime(2024, 5, 13), datetime.datetime(2024, 5, 17)
+            first = await api.request_quotes(instrument_vw, start=start, end=end, resolution="1D")
+            second = await api.request_quotes(instrument_vw, start=start, end=end, resolution="1D")
+            assert len(first) == 5
+            assert [q.close for q in first] == [q.close for q in second]
+            assert sum(onvista_server.hits.values()) == 1
+            assert cache.stats.hits == 1
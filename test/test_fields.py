@@ -0,0 +1,120 @@
+import copy
+import dataclasses
+import json
+from typing import Optional
+
+import pytest
+
+from src.pyonvista.api import FIELD_MAP, EXTRACTORS, EXTRACTION_STATS, CompanyInfo, FinancialRatios, _apply_snapshot
+from src.pyonvista.fields import Field, compile_extractor, project, safe_float, safe_int
+
+
+@dataclasses.dataclass
+class Sample:
+    price: Optional[float] = None
+    first: Optional[float] = None
+    count: Optional[int] = None
+    label: str = "none"
+
+
+SAMPLE_FIELDS = (
+    Field("price", "quote.last", safe_float, fallback="quote.close"),
+    Field("first", "history.list.0.value", safe_float),
+    Field("count", "history.count", safe_int),
+)
+
+
+class TestCompileExtractor:
+    def test_paths(self):
+        extract = compile_extractor(Sample, SAMPLE_FIELDS)
+        sample = extract({"quote": {"last": "1.5"}, "history": {"count": "3", "list": [{"value": 2}, {"value": 1}]}})
+        assert sample == Sample(price=1.5, first=2.0, count=3)
+        assert extract({}) == extract(None) == Sample()
+
+    def test_missing_and_empty(self):
+        extract = compile_extractor(Sample, SAMPLE_FIELDS)
+        assert extract({"history": {"list": []}}) == Sample()
+        assert extract({"quote": None, "history": {"list": [{}]}}) == Sample()
+
+    def test_fallback(self):
+        extract = compile_extractor(Sample, SAMPLE_FIELDS)
+        assert extract({"quote": {"close": 2.0}}).price == 2.0
+        assert extract({"quote": {"last": 0.0, "close": 2.0}}).price == 2.0
+        # a falsy value is kept if the fallback has no value either
+        assert extract({"quote": {"last": 0.0}}).price == 0.0
+
+    def test_malformed_section_keeps_others(self):
+        extract = compile_extractor(Sample, SAMPLE_FIELDS)
+        sample = extract({"quote": {"last": 1.0}, "history": {"count": 4, "list": 7}})
+        assert sample == Sample(price=1.0, count=4)
+        assert extract({"quote": "text", "history": {"count": 4}}) == Sample(count=4)
+
+    def test_unknown_field(self):
+        with pytest.raises(ValueError):
+            compile_extractor(Sample, [Field("volume", "quote.volume")])
+
+    def test_fields_are_exposed(self):
+        assert compile_extractor(Sample, SAMPLE_FIELDS).fields == SAMPLE_FIELDS
+
+
+class TestFieldMap:
+    def test_every_extractor_is_compiled(self):
+        assert set(EXTRACTORS) == set(FIELD_MAP)
+
+    def test_snapshot(self, instrument_vw, instrument_etf):
+        ratios = instrument_vw.get_financial_ratios()
+        assert ratios.pe_ratio == 3.91
+        assert isinstance(ratios, FinancialRatios)
+        info = instrument_vw.get_company_info()
+        assert isinstance(info, CompanyInfo) and info.country == "DE"
+        assert instrument_etf.get_financial_ratios() == FinancialRatios()
+
+    def test_balance_sheet_eps_fallback(self, instrument_vw):
+        snapshot = dict(instrument_vw.dict)
+        snapshot["stocksCnFundamentalList"] = {"list": [{"cnEpsAdj": None}]}
+        snapshot["stocksBalanceSheetList"] = {"list": [{"eps": "12.5"}]}
+        assert EXTRACTORS[FinancialRatios](snapshot).eps == 12.5
+
+
+class TestMemoization:
+    def test_hits(self, instrument_vw):
+        stats = EXTRACTION_STATS[FinancialRatios]
+        hits, misses = stats.hits, stats.misses
+        first = instrument_vw.get_financial_ratios()
+        assert instrument_vw.get_financial_ratios() == first
+        assert instrument_vw.get_financial_ratios() == first
+        assert (stats.hits - hits, stats.misses - misses) == (2, 1)
+
+    def test_results_are_copies(self, instrument_vw):
+        ratios = instrument_vw.get_financial_ratios()
+        ratios.pe_ratio = None
+        assert instrument_vw.get_financial_ratios().pe_ratio == 3.91
+        assert instrument_vw.get_financial_ratios() is not instrument_vw.get_financial_ratios()
+
+    def test_new_snapshot_invalidates(self, instrument_vw):
+        assert instrument_vw.get_financial_ratios().pe_ratio == 3.91
+        instrument_vw.get_company_info()
+        expirations = EXTRACTION_STATS[CompanyInfo].expirations
+
+        snapshot = json.loads(json.dumps(instrument_vw.dict))
+        snapshot["stocksCnFundamentalList"]["list"][0]["cnPer"] = 5.0
+        _apply_snapshot(instrument_vw, snapshot)
+        assert instrument_vw.get_financial_ratios().pe_ratio == 5.0
+        assert EXTRACTION_STATS[CompanyInfo].expirations == expirations + 1
+
+        instrument_vw._snapshot_json = {}
+        assert instrument_vw.get_financial_ratios() == FinancialRatios()
+
+    def test_copies_do_not_share_results(self, instrument_vw):
+        first = instrument_vw.get_financial_ratios()
+        duplicate = copy.copy(instrument_vw)
+        duplicate._snapshot_json = {}
+        assert duplicate.get_financial_ratios() == FinancialRatios()
+        assert instrument_vw.get_financial_ratios() == first
+
+
+class TestProject:
+    def test_paths(self):
+        data = {"a": {"list": [{"x": 1, "y": 2}, {"x": 3}], "z": 5}, "b": [1, 2], "c": 3}
+        assert project(data, ["a.list.0.x", "b", "a.missing", "missing.x"]) == {"a": {"list": [{"x": 1}]}, "b": [1, 2]}
+        assert data["a"]["list"][0] == {"x": 1, "y": 2}
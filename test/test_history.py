@@ -0,0 +1,229 @@
+import asyncio
+import datetime
+from urllib.parse import urlsplit, parse_qs
+
+import pytest
+
+from src.pyonvista.api import PyOnVista
+from src.pyonvista.history import CHUNK_DAYS, QuoteHistoryCache, merge_ranges, subtract_ranges, split_range, merge_bars
+
+from conftest import make_chart_history
+
+D = datetime.date
+
+
+def chart_requests(onvista_server) -> list:
+    """(startDate, endDate) of all chart_history requests the server has seen"""
+    requests = []
+    for path, hits in onvista_server.hits.items():
+        if "chart_history" in path:
+            query = parse_qs(urlsplit(path).query)
+            requests += [(query["startDate"][0], query["endDate"][0])] * hits
+    return sorted(requests)
+
+
+class TestRanges:
+    def test_merge(self):
+        assert merge_ranges([(D(2024, 1, 5), D(2024, 1, 9)), (D(2024, 1, 1), D(2024, 1, 4)),
+                             (D(2024, 1, 20), D(2024, 1, 21))]) == [
+            (D(2024, 1, 1), D(2024, 1, 9)), (D(2024, 1, 20), D(2024, 1, 21))]
+
+    def test_subtract(self):
+        covered = [(D(2024, 1, 5), D(2024, 1, 9)), (D(2024, 1, 20), D(2024, 1, 21))]
+        assert subtract_ranges(D(2024, 1, 1), D(2024, 1, 31), covered) == [
+            (D(2024, 1, 1), D(2024, 1, 4)), (D(2024, 1, 10), D(2024, 1, 19)), (D(2024, 1, 22), D(2024, 1, 31))]
+        assert subtract_ranges(D(2024, 1, 6), D(2024, 1, 8), covered) == []
+        assert subtract_ranges(D(2024, 1, 8), D(2024, 1, 12), covered) == [(D(2024, 1, 10), D(2024, 1, 12))]
+
+
+class TestChunks:
+    def test_split_range(self):
+        assert split_range(D(2024, 1, 1), D(2024, 1, 10), 4) == [
+            (D(2024, 1, 1), D(2024, 1, 4)), (D(2024, 1, 5), D(2024, 1, 8)), (D(2024, 1, 9), D(2024, 1, 10))]
+        assert split_range(D(2024, 1, 1), D(2024, 1, 1), 4) == [(D(2024, 1, 1), D(2024, 1, 1))]
+        with pytest.raises(ValueError):
+            split_range(D(2024, 1, 1), D(2024, 1, 2), 0)
+
+    def test_merge_bars_removes_duplicates(self):
+        first = make_chart_history(D(2024, 5, 6), D(2024, 5, 7), "1D")
+        second = make_chart_history(D(2024, 5, 7), D(2024, 5, 8), "1D")
+        merged = merge_bars([second, None, first])
+        assert [bar[0] for bar in merged] == sorted(set(first["datetimeLast"] + second["datetimeLast"]))
+
+    @pytest.mark.asyncio
+    async def test_long_window_is_chunked(self, onvista_server, aio_client, instrument_vw):
+        api = PyOnVista(request_delay=0, api_base=onvista_server.api_base, chunk_days={"1m": 3})
+        await api.install_client(aio_client)
+        onvista_server.delay = 0.02
+        quotes = await api.request_quotes(instrument_vw, datetime.datetime(2024, 5, 6),
+                                          datetime.datetime(2024, 5, 17), resolution="1m")
+        assert chart_requests(onvista_server) == [
+            ("2024-05-06", "2024-05-08"), ("2024-05-09", "2024-05-11"),
+            ("2024-05-12", "2024-05-14"), ("2024-05-15", "2024-05-17")]
+        assert onvista_server.peak_in_flight > 1
+        expected = make_chart_history(D(2024, 5, 6), D(2024, 5, 17), "1m")
+        assert [q.timestamp.timestamp() for q in quotes] == expected["datetimeLast"]
+        timings = list(api.chunk_timings)
+        assert len(timings) == 4
+        assert sum(t.bars for t in timings) == len(quotes)
+        assert all(t.seconds > 0 and t.resolution == "1m" for t in timings)
+
+    @pytest.mark.asyncio
+    async def test_failed_chunk_returns_no_bars(self, onvista_server, aio_client, instrument_vw, caplog):
+        api = PyOnVista(request_delay=0, api_base=onvista_server.api_base, chunk_days={"1D": 3})
+        await api.install_client(aio_client)
+        onvista_server.failing_chunks.add("2024-05-09")
+        quotes = await api.request_quotes(instrument_vw, datetime.datetime(2024, 5, 6),
+                                          datetime.datetime(2024, 5, 17), resolution="1D")
+        assert len(chart_requests(onvista_server)) == 4
+        assert quotes == []
+        assert "2024-05-09..2024-05-11" in caplog.text
+
+    @pytest.mark.asyncio
+    async def test_failed_chunk_is_not_cached(self, onvista_server, aio_client, instrument_vw):
+        cache = QuoteHistoryCache()
+        api = PyOnVista(request_delay=0, api_base=onvista_server.api_base, chunk_days={"1D": 3}, quote_cache=cache)
+        await api.install_client(aio_client)
+        start, end = datetime.datetime(2024, 5, 6), datetime.datetime(2024, 5, 17)
+        onvista_server.failing_chunks.add("2024-05-09")
+        assert await api.request_quotes(instrument_vw, start, end, resolution="1D") == []
+        key = cache.key(instrument_vw, instrument_vw.notations[0], "1D")
+        assert cache.missing_ranges(key, start.date(), end.date()) == [(D(2024, 5, 9), D(2024, 5, 11))]
+
+        onvista_server.failing_chunks.clear()
+        quotes = await api.request_quotes(instrument_vw, start, end, resolution="1D")
+        assert chart_requests(onvista_server).count(("2024-05-09", "2024-05-11")) == 2
+        assert len(chart_requests(onvista_server)) == 5
+        assert len(quotes) == 10
+
+    @pytest.mark.asyncio
+    async def test_default_window_is_one_request(self, local_api: PyOnVista, onvista_server, instrument_vw):
+        for resolution in CHUNK_DAYS:
+            await local_api.request_quotes(instrument_vw, resolution=resolution)
+        assert len(chart_requests(onvista_server)) == len(CHUNK_DAYS)
+
+    @pytest.mark.asyncio
+    async def test_missing_ranges_are_chunked(self, onvista_server, aio_client, instrument_vw):
+        api = PyOnVista(request_delay=0, api_base=onvista_server.api_base, chunk_days={"1D": 5},
+                        quote_cache=QuoteHistoryCache())
+        await api.install_client(aio_client)
+        await api.request_quotes(instrument_vw, datetime.datetime(2024, 5, 8),
+                                 datetime.datetime(2024, 5, 9), resolution="1D")
+        quotes = await api.request_quotes(instrument_vw, datetime.datetime(2024, 5, 1),
+                                          datetime.datetime(2024, 5, 20), resolution="1D")
+        assert chart_requests(onvista_server) == [
+            ("2024-05-01", "2024-05-05"), ("2024-05-06", "2024-05-07"),
+            ("2024-05-08", "2024-05-09"), ("2024-05-10", "2024-05-14"), ("2024-05-15", "2024-05-19"),
+            ("2024-05-20", "2024-05-20")]
+        assert len(quotes) == 14
+
+
+class TestQuoteHistoryCache:
+    KEY = ("81490", "1091000", "1D")
+
+    def test_add_and_bars(self):
+        cache = QuoteHistoryCache()
+        cache.add(self.KEY, D(2024, 5, 6), D(2024, 5, 10), make_chart_history(D(2024, 5, 6), D(2024, 5, 10), "1D"))
+        assert len(cache.bars(self.KEY, D(2024, 5, 6), D(2024, 5, 10))) == 5
+        assert len(cache.bars(self.KEY, D(2024, 5, 8), D(2024, 5, 8))) == 1
+        assert cache.missing_ranges(self.KEY, D(2024, 5, 1), D(2024, 5, 10)) == [(D(2024, 5, 1), D(2024, 5, 5))]
+
+    def test_today_is_never_covered(self):
+        cache = QuoteHistoryCache()
+        data = make_chart_history(D(2024, 5, 6), D(2024, 5, 10), "1D")
+        cache.add(self.KEY, D(2024, 5, 6), D(2024, 5, 10), data, today=D(2024, 5, 9))
+        assert cache.covered(self.KEY) == [(D(2024, 5, 6), D(2024, 5, 8))]
+        assert len(cache.bars(self.KEY, D(2024, 5, 6), D(2024, 5, 10))) == 5
+
+    def test_revised_bar_is_replaced(self):
+        cache = QuoteHistoryCache()
+        data = make_chart_history(D(2024, 5, 6), D(2024, 5, 6), "1D")
+        cache.add(self.KEY, D(2024, 5, 6), D(2024, 5, 6), data)
+        data["last"][0] = 1.0
+        cache.add(self.KEY, D(2024, 5, 6), D(2024, 5, 6), data)
+        (bar,) = cache.bars(self.KEY, D(2024, 5, 6), D(2024, 5, 6))
+        assert bar[4] == 1.0
+
+
+class TestCachedRequestQuotes:
+    @pytest.mark.asyncio
+    async def test_only_missing_days_are_fetched(self, onvista_server, aio_client, instrument_vw):
+        cache = QuoteHistoryCache()
+        api = PyOnVista(request_delay=0, api_base=onvista_server.api_base, quote_cache=cache)
+        await api.install_client(aio_client)
+
+        first = await api.request_quotes(instrument_vw, datetime.datetime(2024, 5, 6),
+                                         datetime.datetime(2024, 5, 17), resolution="15m")
+        second = await api.request_quotes(instrument_vw, datetime.datetime(2024, 5, 13),
+                                          datetime.datetime(2024, 5, 24), resolution="15m")
+        assert chart_requests(onvista_server) == [("2024-05-06", "2024-05-17"), ("2024-05-18", "2024-05-24")]
+        assert len(first) == len(second) == 10 * 34
+        assert [q.timestamp for q in second] == sorted(q.timestamp for q in second)
+        assert second[0].timestamp == datetime.datetime(2024, 5, 13, 9, 0)
+
+        expected = make_chart_history(D(2024, 5, 13), D(2024, 5, 24), "15m")
+        assert [q.close for q in second] == expected["last"]
+
+        third = await api.request_quotes(instrument_vw, datetime.datetime(2024, 5, 8),
+                                         datetime.datetime(2024, 5, 20), resolution="15m")
+        assert len(chart_requests(onvista_server)) == 2
+        assert len(third) == 9 * 34
+        assert cache.stats.hits == 1
+
+    @pytest.mark.asyncio
+    async def test_resolutions_are_cached_separately(self, onvista_server, aio_client, instrument_vw):
+        api = PyOnVista(request_delay=0, api_base=onvista_server.api_base, quote_cache=QuoteHistoryCache())
+        await api.install_client(aio_client)
+        start, end = datetime.datetime(2024, 5, 6), datetime.datetime(2024, 5, 10)
+        assert len(await api.request_quotes(instrument_vw, start, end, resolution="1D")) == 5
+        assert len(await api.request_quotes(instrument_vw, start, end, resolution="15m")) == 5 * 34
+        assert len(chart_requests(onvista_server)) == 2
+
+
+class TestIterQuotes:
+    @pytest.fixture()
+    async def api(self, onvista_server, aio_client) -> PyOnVista:
+        api = PyOnVista(request_delay=0, api_base=onvista_server.api_base, chunk_days={"15m": 2})
+        await api.install_client(aio_client)
+        return api
+
+    @pytest.mark.asyncio
+    async def test_matches_request_quotes(self, api: PyOnVista, instrument_vw):
+        start, end = datetime.datetime(2024, 5, 6), datetime.datetime(2024, 5, 17)
+        streamed = [q async for q in api.iter_quotes(instrument_vw, start, end)]
+        quotes = await api.request_quotes(instrument_vw, start, end)
+        assert [q.timestamp for q in streamed] == [q.timestamp for q in quotes]
+        assert [q.close for q in streamed] == [q.close for q in quotes]
+
+    @pytest.mark.asyncio
+    async def test_blocks(self, api: PyOnVista, instrument_vw):
+        blocks = [b async for b in api.iter_quotes(instrument_vw, datetime.datetime(2024, 5, 6),
+                                                   datetime.datetime(2024, 5, 12), blocks=True)]
+        # the chunk 2024-05-12..2024-05-12 has no trading day and yields no block
+        assert [len(block) for block in blocks] == [2 * 34, 2 * 34, 34]
+        assert blocks[0].timestamp[-1] < blocks[1].timestamp[0]
+
+    @pytest.mark.asyncio
+    async def test_resume_since(self, api: PyOnVista, instrument_vw):
+        start, end = datetime.datetime(2024, 5, 6), datetime.datetime(2024, 5, 10)
+        everything = [q async for q in api.iter_quotes(instrument_vw, start, end)]
+        since = everything[100].timestamp
+        resumed = [q async for q in api.iter_quotes(instrument_vw, start, end, since=since)]
+        assert [q.timestamp for q in resumed] == [q.timestamp for q in everything[101:]]
+
+    @pytest.mark.asyncio
+    async def test_back_pressure(self, api: PyOnVista, onvista_server, instrument_vw):
+        stream = api.iter_quotes(instrument_vw, datetime.datetime(2024, 5, 1),
+                                 datetime.datetime(2024, 5, 31), prefetch=1)
+        await stream.__anext__()
+        await asyncio.sleep(0.05)
+        assert len(chart_requests(onvista_server)) == 2
+        await stream.aclose()
+
+    @pytest.mark.asyncio
+    async def test_failed_chunk_raises(self, api: PyOnVista, onvista_server, instrument_vw):
+        onvista_server.status[f"/api/v1/instruments/STOCK/{instrument_vw.uid}/chart_history"] = 500
+        with pytest.raises(ValueError):
+            async for _ in api.iter_quotes(instrument_vw, datetime.datetime(2024, 5, 6),
+                                           datetime.datetime(2024, 5, 10)):
+                pass
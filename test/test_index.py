@@ -0,0 +1,131 @@
+import json
+
+import pytest
+
+from src.pyonvista.api import PyOnVista
+from src.pyonvista import schema
+from src.pyonvista.index import InstrumentIndex, tokenize
+
+from conftest import load_asset
+
+
+def search_requests(onvista_server) -> int:
+    return sum(hits for path, hits in onvista_server.hits.items() if "search/facet" in path)
+
+
+@pytest.fixture()
+def index() -> InstrumentIndex:
+    index = InstrumentIndex()
+    index.add_search(load_asset("search_vw.json"))
+    return index
+
+
+class TestInstrumentIndex:
+    def test_tokenize(self):
+        assert tokenize("Volkswagen (VW) Vz") == ["volkswagen", "vw", "vz"]
+        assert tokenize("S&P 500 UCITS-ETF") == ["s", "p", "500", "ucits", "etf"]
+
+    def test_exact_only(self, index):
+        assert [entry["isin"] for entry in index.exact(" vow ")] == ["DE0007664005"]
+        assert index.exact("Volkswagen") == []
+
+    def test_exact(self, index):
+        assert len(index) == 3
+        assert index.get("de0007664039")["symbol"] == "VOW3"
+        assert index.get("766400")["isin"] == "DE0007664005"
+        assert index.get("XX0000000000") is None
+        assert [entry["isin"] for entry in index.by_symbol("vow3")] == ["DE0007664039"]
+        assert "DE0007664039" in index
+        assert (index.stats.hits, index.stats.misses) == (3, 1)
+
+    def test_name_prefixes(self, index):
+        assert [entry["isin"] for entry in index.search("Volksw")] == ["DE0007664005", "DE0007664039"]
+        assert [entry["isin"] for entry in index.search("volkswagen vz")] == ["DE0007664039"]
+        assert [entry["isin"] for entry in index.search("core s&p")] == ["IE00B42NKQ00"]
+        assert index.search("Volkswagen Ucits") == []
+        assert len(index.search("v", limit=1)) == 1
+
+    def test_identifiers_first(self, index):
+        assert [entry["isin"] for entry in index.search("VOW")][0] == "DE0007664005"
+        assert [entry["isin"] for entry in index.search("766403")] == ["DE0007664039"]
+
+    def test_replace(self, index):
+        entry = dict(index.get("DE0007664039"), name="Renamed AG", symbol="RNM")
+        index.add(entry)
+        assert index.search("Volkswagen vz") == []
+        assert index.by_symbol("VOW3") == []
+        assert index.search("renamed")[0]["isin"] == "DE0007664039"
+        assert len(index) == 3
+
+    def test_update_keeps_missing_fields(self, index):
+        # the instrument section of a snapshot carries no wkn
+        entry = dict(index.get("DE0007664039"), name="Volkswagen AG Vz")
+        del entry["wkn"]
+        index.add(entry)
+        assert index.get("766403")["name"] == "Volkswagen AG Vz"
+        assert [entry["isin"] for entry in index.search("volkswagen ag")] == ["DE0007664039"]
+        assert index.search("volkswagen (vw) vz") == []
+
+    def test_persistence(self, index, tmp_path):
+        path = tmp_path / "index.json"
+        index.save(path)
+        restored = InstrumentIndex(path)
+        assert len(restored) == 3
+        assert restored.search("volkswagen") == index.search("volkswagen")
+        with pytest.raises(ValueError):
+            InstrumentIndex().save()
+
+
+class TestIndexedSearch:
+    @pytest.fixture()
+    async def api(self, onvista_server, aio_client) -> PyOnVista:
+        api = PyOnVista(request_delay=0, api_base=onvista_server.api_base, index=InstrumentIndex())
+        await api.install_client(aio_client)
+        return api
+
+    @pytest.mark.asyncio
+    async def test_identifier_search_is_local(self, api, onvista_server):
+        await api.search_instrument("Volkswagen")
+        assert [i.isin for i in await api.search_instrument("vow3")] == ["DE0007664039"]
+        assert [i.uid for i in await api.search_instrument("766400")] == ["81489"]
+        assert search_requests(onvista_server) == 1
+
+    @pytest.mark.asyncio
+    async def test_names_go_to_the_api(self, api, onvista_server):
+        # the index knows only one of the instruments named Volkswagen
+        await api.request_instrument(isin="DE0007664039")
+        found = await api.search_instrument("Volkswagen")
+        assert {i.isin for i in found} == {"DE0007664039", "DE0007664005"}
+        assert search_requests(onvista_server) == 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("typed", [False, pytest.param(True, marks=pytest.mark.skipif(
+        schema.msgspec is None, reason="msgspec is not installed"))])
+    async def test_snapshot_keeps_wkn(self, typed, onvista_server, aio_client):
+        api = PyOnVista(request_delay=0, api_base=onvista_server.api_base, index=InstrumentIndex(),
+                        typed_snapshots=typed)
+        await api.install_client(aio_client)
+        if not typed:
+            snapshot = json.loads(onvista_server.snapshots["DE0007664039"])
+            del snapshot["instrument"]["wkn"]
+            onvista_server.snapshots["DE0007664039"] = json.dumps(snapshot).encode()
+        await api.search_instrument("Volkswagen")
+        instrument = (await api.search_instrument("766403"))[0]
+        await api.request_instrument(instrument)
+        assert [i.isin for i in await api.search_instrument("766403")] == ["DE0007664039"]
+        assert search_requests(onvista_server) == 1
+
+    @pytest.mark.asyncio
+    async def test_filters_apply_to_local_results(self, api, onvista_server):
+        await api.search_instrument("Volkswagen")
+        assert await api.search_instrument("VOW3", instrument_type="FUND") == []
+        # the local miss is answered by the api
+        assert search_requests(onvista_server) == 2
+
+    @pytest.mark.asyncio
+    async def test_snapshot_fills_index(self, api, onvista_server):
+        await api.request_instrument(isin="IE00B42NKQ00")
+        found = await api.search_by_isin("IE00B42NKQ00")
+        assert found.uid == "99206463" and found.type == "FUND"
+        assert (await api.search_instrument("IUSA"))[0].isin == "IE00B42NKQ00"
+        assert search_requests(onvista_server) == 0
@@ -1,8 +1,101 @@
+import collections.abc
+import datetime
+import gc
+import pickle
 
-from src.pyonvista.api import Instrument
+import pytest
+
+from src.pyonvista.api import Instrument, Quote, Market, Notation
+from src.pyonvista.tree import TreeView
 
 
 class TestInstrument:
     def test_init(self):
         instrument = Instrument()
         assert instrument
+
+
+class TestQuote:
+    def make_quote(self, instrument) -> Quote:
+        return Quote("1m", datetime.datetime(2024, 5, 6, 9), 1.0, 2.0, 0.5, 1.5, 100, 10, instrument)
+
+    def test_slotted(self):
+        quote = self.make_quote(Instrument())
+        assert not hasattr(quote, "__dict__")
+
+    def test_keeps_instrument(self):
+        quote = self.make_quote(Instrument(name="held"))
+        gc.collect()
+        assert quote.instrument.name == "held"
+
+    def test_eq_ignores_instrument(self):
+        assert self.make_quote(Instrument(name="a")) == self.make_quote(Instrument(name="b"))
+
+    def test_pickle_keeps_instrument(self, instrument_vw):
+        restored = pickle.loads(pickle.dumps(instrument_vw))
+        assert restored.quote == instrument_vw.quote
+        assert restored.quote.instrument is restored
+
+
+class TestMarket:
+    def test_intern(self):
+        assert Market.intern("Xetra", "GER") is Market.intern("Xetra", "GER")
+        assert Market.intern("Xetra", "GER") == Market("Xetra", "GER")
+        assert Market.intern("Xetra", "GER") is not Market.intern("Tradegate", "GAT")
+
+    def test_notations_share_markets(self, instrument_vw, instrument_etf):
+        assert instrument_vw.notations[0].market is instrument_etf.notations[0].market
+        assert not hasattr(instrument_vw.notations[0], "__dict__")
+        assert isinstance(instrument_vw.notations[0], Notation)
+
+
+class TestAsTree:
+    def test_attributes(self, instrument_vw):
+        tree = instrument_vw.as_tree
+        assert tree.instrument.isin == "DE0007664039"
+        assert tree.quoteList.list[0].market.codeExchange == instrument_vw.dict["quoteList"]["list"][0]["market"]["codeExchange"]
+        assert len(tree.quoteList.list) == len(instrument_vw.notations)
+        assert [item.market.name for item in tree.quoteList.list] == [n.market.name for n in instrument_vw.notations]
+        with pytest.raises(AttributeError):
+            tree.noSuchSection
+
+    def test_lists(self):
+        tree = TreeView({"values": [1, 2, 3], "nested": [[1], [2]]})
+        assert isinstance(tree.values, collections.abc.Sequence)
+        assert tree.values == [1, 2, 3] and tree.values != [1, 2]
+        assert tree.nested == [[1], [2]]
+        assert 2 in tree.values and tree.values.index(3) == 2
+        assert list(reversed(tree.values)) == [3, 2, 1]
+        assert list(tree.values) == [1, 2, 3]
+
+    def test_list_index_out_of_range(self):
+        tree = TreeView({"values": [1, 2, 3], "nested": [[1], [2]]})
+        assert tree.values[-3] == 1 and tree.nested[-1] == [2]
+        for index in (-5, -4, 3):
+            with pytest.raises(IndexError):
+                tree.values[index]
+        with pytest.raises(IndexError):
+            tree.nested[-3]
+        assert tree.nested[-2] == [1]
+
+    def test_cached_view(self, instrument_vw):
+        tree = instrument_vw.as_tree
+        assert instrument_vw.as_tree is tree
+        assert tree.company is tree.company
+        assert tree.instrument._data is instrument_vw.dict["instrument"]
+
+    def test_new_snapshot_replaces_view(self, instrument_vw):
+        tree = instrument_vw.as_tree
+        instrument_vw._snapshot_json = {"instrument": {"isin": "X"}}
+        assert instrument_vw.as_tree is not tree
+        assert instrument_vw.as_tree.instrument.isin == "X"
+
+    def test_read_only(self, instrument_vw):
+        with pytest.raises(AttributeError):
+            instrument_vw.as_tree.instrument.isin = "X"
+        assert instrument_vw.dict["instrument"]["isin"] == "DE0007664039"
+
+    def test_pickle(self, instrument_vw):
+        instrument_vw.as_tree.company.branch
+        restored = pickle.loads(pickle.dumps(instrument_vw))
+        assert restored.as_tree.company.branch == instrument_vw.as_tree.company.branch
@@ -0,0 +1,144 @@
+import asyncio
+import json
+
+import pytest
+
+from src.pyonvista.api import PyOnVista, Quote
+from src.pyonvista.poller import QuotePoller
+
+from conftest import FakeClock
+
+VW = "DE0007664039"
+EXPIRES = 1893456000  # expires field of the snapshots in test/assets
+
+
+def set_snapshot(onvista_server, isin: str, **fields):
+    """Changes the instrument expiry or quote fields of a snapshot served by the stub"""
+    snapshot = json.loads(onvista_server.snapshots[isin])
+    if "expires" in fields:
+        snapshot["instrument"]["expires"] = fields.pop("expires")
+    snapshot["quote"].update(fields)
+    onvista_server.snapshots[isin] = json.dumps(snapshot).encode()
+
+
+def snapshot_requests(onvista_server) -> int:
+    return sum(hits for path, hits in onvista_server.hits.items() if path.endswith("/snapshot"))
+
+
+class Recorder:
+    def __init__(self):
+        self.quotes = []
+
+    async def __call__(self, quote: Quote):
+        self.quotes.append(quote)
+
+
+class TestQuotePoller:
+    @pytest.fixture()
+    def clock(self) -> FakeClock:
+        return FakeClock(EXPIRES - 3600)
+
+    @pytest.fixture()
+    def poller(self, local_api: PyOnVista, clock) -> QuotePoller:
+        return QuotePoller(local_api, interval=60, clock=clock, sleep=clock.sleep)
+
+    @pytest.mark.asyncio
+    async def test_first_poll_pushes_quotes(self, poller, onvista_server):
+        recorder = Recorder()
+        poller.subscribe(VW, recorder)
+        poller.subscribe("IE00B42NKQ00", recorder)
+        assert await poller.poll() == 2
+        assert {quote.instrument.isin for quote in recorder.quotes} == {VW, "IE00B42NKQ00"}
+        assert snapshot_requests(onvista_server) == 2
+        assert VW in poller and len(poller) == 2
+
+    @pytest.mark.asyncio
+    async def test_respects_snapshot_valid_until(self, poller, onvista_server, clock):
+        poller.subscribe(VW, Recorder())
+        await poller.poll()
+        assert poller.next_due() == EXPIRES
+        clock.now += 120
+        await poller.poll()
+        assert snapshot_requests(onvista_server) == 1
+
+        clock.now = EXPIRES
+        await poller.poll()
+        assert snapshot_requests(onvista_server) == 2
+        assert poller.next_due() == EXPIRES + 60
+
+    @pytest.mark.asyncio
+    async def test_pushes_changed_quotes_only(self, poller, onvista_server, clock):
+        set_snapshot(onvista_server, VW, expires=clock.now)
+        recorder = Recorder()
+        subscription = poller.subscribe(VW, recorder)
+        assert await poller.poll() == 1
+
+        clock.now += 60
+        assert await poller.poll() == 0
+        set_snapshot(onvista_server, VW, last=120.5)
+        clock.now += 60
+        assert await poller.poll() == 1
+        assert snapshot_requests(onvista_server) == 3
+        assert [quote.close for quote in recorder.quotes] == [118.62, 120.5]
+        assert recorder.quotes[-1] is subscription.instrument.quote
+
+    @pytest.mark.asyncio
+    async def test_batches_are_staggered(self, local_api: PyOnVista, onvista_server, clock):
+        poller = QuotePoller(local_api, batch_size=10, stagger=2.0, clock=clock, sleep=clock.sleep)
+        onvista_server.delay = 0.01
+        recorder = Recorder()
+        for number in range(25):
+            poller.subscribe(onvista_server.add_snapshot(f"DE{number:010d}"), recorder)
+        assert await poller.poll() == 25
+        assert clock.slept == [2.0, 2.0]
+        assert onvista_server.peak_in_flight == 10
+
+    @pytest.mark.asyncio
+    async def test_subscribers(self, poller, onvista_server, clock, caplog):
+        first, second = Recorder(), Recorder()
+
+        async def failing(quote: Quote):
+            raise RuntimeError("subscriber failed")
+
+        poller.subscribe(VW, first)
+        poller.subscribe(VW, failing)
+        assert await poller.poll() == 2
+        assert "subscriber failed" in caplog.text
+
+        # a new subscriber receives the quote with the next refresh
+        poller.subscribe(VW, second)
+        clock.now = EXPIRES
+        assert await poller.poll() == 1
+        assert len(first.quotes) == 1 and len(second.quotes) == 1
+
+        poller.unsubscribe(VW, first)
+        assert VW in poller
+        poller.unsubscribe(VW)
+        assert VW not in poller and poller.next_due() is None
+
+    @pytest.mark.asyncio
+    async def test_failed_request_is_retried(self, poller, onvista_server, clock):
+        recorder = Recorder()
+        poller.subscribe("XX0000000000", recorder)
+        poller.subscribe(VW, recorder)
+        assert await poller.poll() == 1
+        assert poller.next_due() == clock.now + 60
+
+    @pytest.mark.asyncio
+    async def test_run(self, local_api: PyOnVista, onvista_server):
+        recorder = Recorder()
+        # the real clock, the snapshot is then valid for years
+        async with QuotePoller(local_api) as poller:
+            poller.subscribe(VW, recorder)
+            for _ in range(100):
+                if recorder.quotes:
+                    break
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.05)
+        assert len(recorder.quotes) == 1
+        assert snapshot_requests(onvista_server) == 1
+        assert poller._task is None
+
+    def test_invalid_batch_size(self, local_api: PyOnVista):
+        with pytest.raises(ValueError):
+            QuotePoller(local_api, batch_size=0)
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from src.pyonvista.api import PyOnVista, Instrument, EXTRACTOR_PATHS, FIELD_MAP
+from src.pyonvista.cache import SnapshotCache
+
+ISIN = "DE0007664039"
+EXTRACTORS = ("get_financial_ratios", "get_performance_metrics", "get_technical_indicators",
+              "get_company_info", "get_sustainability_data")
+
+
+async def request(onvista_server, aio_client, retention: str, **kwargs) -> Instrument:
+    api = PyOnVista(request_delay=0, api_base=onvista_server.api_base, retention=retention, **kwargs)
+    await api.install_client(aio_client)
+    return await api.request_instrument(isin=ISIN)
+
+
+class TestRetention:
+    @pytest.fixture()
+    def expected(self, onvista_server) -> Instrument:
+        return Instrument.from_snapshot(json.loads(onvista_server.snapshots[ISIN]))
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("retention", ["all", "extractors", "none"])
+    async def test_extractors_agree(self, onvista_server, aio_client, expected, retention):
+        instrument = await request(onvista_server, aio_client, retention)
+        for extractor in EXTRACTORS:
+            assert getattr(instrument, extractor)() == getattr(expected, extractor)()
+        assert instrument.isin == ISIN and instrument.quote.close == expected.quote.close
+        assert len(instrument.notations) == len(expected.notations)
+
+    @pytest.mark.asyncio
+    async def test_retained_bytes(self, onvista_server, aio_client):
+        sizes = {}
+        for retention in ("all", "extractors", "none"):
+            instrument = await request(onvista_server, aio_client, retention)
+            for extractor in EXTRACTORS:
+                getattr(instrument, extractor)()
+            sizes[retention] = instrument.retained_bytes
+        assert sizes["all"] > sizes["extractors"] > sizes["none"]
+
+    @pytest.mark.asyncio
+    async def test_extractors_keeps_used_sections(self, onvista_server, aio_client):
+        instrument = await request(onvista_server, aio_client, "extractors")
+        sections = {path.split(".")[0] for path in EXTRACTOR_PATHS}
+        assert set(instrument.dict) <= sections
+        assert "quoteList" not in instrument.dict
+        assert len(instrument.dict["stocksCnFundamentalList"]["list"]) == 1
+
+    @pytest.mark.asyncio
+    async def test_none(self, onvista_server, aio_client):
+        instrument = await request(onvista_server, aio_client, "none")
+        assert instrument.dict == {}
+        assert len(instrument._extracted) == len(FIELD_MAP)
+
+    @pytest.mark.asyncio
+    async def test_cached_snapshot_is_not_pruned(self, onvista_server, aio_client):
+        cache = SnapshotCache()
+        await request(onvista_server, aio_client, "extractors", snapshot_cache=cache)
+        (cached,) = [cache.get(key) for key in list(cache._entries)]
+        assert "quoteList" in cached
+
+    def test_unknown_policy(self):
+        with pytest.raises(ValueError):
+            PyOnVista(retention="some")
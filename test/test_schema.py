@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from src.pyonvista.api import EXTRACTOR_PATHS, Instrument, PyOnVista
+from src.pyonvista.fields import parse_path
+
+from conftest import ASSETS
+
+msgspec = pytest.importorskip("msgspec")
+from src.pyonvista import schema  # noqa: E402
+
+EXTRACTORS = ("get_financial_ratios", "get_performance_metrics", "get_technical_indicators",
+              "get_company_info", "get_sustainability_data")
+
+
+@pytest.fixture(params=["snapshot_DE0007664039.json", "snapshot_IE00B42NKQ00.json"])
+def body(request) -> bytes:
+    return (ASSETS / request.param).read_bytes()
+
+
+class TestSchema:
+    def test_extractors_agree(self, body):
+        full = Instrument.from_snapshot(json.loads(body))
+        typed = Instrument.from_snapshot(schema.decode_snapshot(body))
+        for extractor in EXTRACTORS:
+            assert getattr(typed, extractor)() == getattr(full, extractor)()
+        assert typed.quote.close == full.quote.close
+        assert [n.id for n in typed.notations] == [n.id for n in full.notations]
+
+    def test_field_map_is_covered(self):
+        # a path added to FIELD_MAP must be added to the structs as well
+        assert [path for path in sorted(EXTRACTOR_PATHS) if not schema.covers(parse_path(path))] == []
+
+    def test_covers(self):
+        assert schema.covers(("company", "branch", "sector", "name"))
+        assert schema.covers(("stocksCnFundamentalList", "list", 0, "cnPer"))
+        assert not schema.covers(("company", "branch", "sector", "code"))
+        assert not schema.covers(("stocksCnFundamentalList", 0))
+        assert not schema.covers(("stocksCnEstimatesList", "list", 0, "cnPer"))
+        assert not schema.covers(("company", "isoCountry", "code"))
+
+    def test_unused_fields_are_dropped(self, body):
+        data = schema.decode_snapshot(body)
+        assert set(data) <= set(schema.Snapshot.__struct_fields__)
+        assert len(json.dumps(data)) < len(body)
+        assert None not in data["instrument"].values()
+
+    def test_struct(self):
+        snapshot = schema.decode_snapshot_struct((ASSETS / "snapshot_DE0007664039.json").read_bytes())
+        assert snapshot.instrument.isin == "DE0007664039"
+        assert snapshot.instrument.wkn == "766403"
+        assert isinstance(snapshot.quoteList.list[0], schema.QuoteData)
+
+    def test_mismatch_falls_back_to_full_decode(self):
+        body = json.dumps({"instrument": {"name": ["not", "a", "string"]}, "other": 1}).encode()
+        assert schema.decode_snapshot(body) == json.loads(body)
+
+    @pytest.mark.asyncio
+    async def test_request_instrument(self, onvista_server, aio_client):
+        api = PyOnVista(request_delay=0, api_base=onvista_server.api_base, typed_snapshots=True)
+        await api.install_client(aio_client)
+        instrument = await api.request_instrument(isin="DE0007664039")
+        expected = Instrument.from_snapshot(json.loads(onvista_server.snapshots["DE0007664039"]))
+        assert instrument.get_financial_ratios() == expected.get_financial_ratios()
+        assert "stocksCnEstimatesList" not in instrument._snapshot_json
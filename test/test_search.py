@@ -0,0 +1,211 @@
+import asyncio
+import gc
+import weakref
+from urllib.parse import urlsplit, parse_qs
+
+import pytest
+
+from src.pyonvista.api import PyOnVista, Instrument
+from src.pyonvista.cache import SearchCache, search_key
+
+from conftest import FakeClock, load_asset
+
+
+class TestSearchMany:
+    @pytest.mark.asyncio
+    async def test_mapping_and_shared_instruments(self, local_api: PyOnVista):
+        found = await local_api.search_many(["Volkswagen", "VOW3", "iShares", "nothing"])
+        assert list(found) == ["Volkswagen", "VOW3", "iShares", "nothing"]
+        assert {i.isin for i in found["Volkswagen"]} == {"DE0007664039", "DE0007664005"}
+        assert found["nothing"] == []
+        (vz,) = found["VOW3"]
+        assert any(i is vz for i in found["Volkswagen"])
+
+    @pytest.mark.asyncio
+    async def test_concurrent(self, local_api: PyOnVista, onvista_server):
+        onvista_server.delay = 0.05
+        terms = ["Volkswagen", "VOW", "766403", "iShares", "IUSA", "A0YEDG"]
+        await local_api.search_many(terms, concurrency=3)
+        assert onvista_server.peak_in_flight == 3
+
+    @pytest.mark.asyncio
+    async def test_failed_term(self, local_api: PyOnVista):
+        found = await local_api.search_many(["", "Volkswagen"], instrument_type="STOCK")
+        assert found[""] == []
+        assert len(found["Volkswagen"]) == 2
+
+    @pytest.mark.asyncio
+    async def test_invalid_concurrency(self, local_api: PyOnVista):
+        with pytest.raises(ValueError):
+            await local_api.search_many(["VW"], concurrency=0)
+
+    @pytest.mark.asyncio
+    async def test_international_stocks(self, local_api: PyOnVista, onvista_server):
+        onvista_server.delay = 0.05
+        results = await local_api.search_international_stocks("VOW", country="DE")
+        assert onvista_server.peak_in_flight == 2
+        assert [i.isin for i in results] == ["DE0007664039", "DE0007664005"]
+
+
+def search_queries(onvista_server) -> list:
+    return [parse_qs(urlsplit(path).query) for path in onvista_server.hits if "search/facet" in path]
+
+
+class TestIdentityMap:
+    @pytest.mark.asyncio
+    async def test_searches_share_instruments(self, local_api: PyOnVista):
+        (vz,) = await local_api.search_instrument("VOW3")
+        assert any(i is vz for i in await local_api.search_instrument("Volkswagen"))
+        assert await local_api.search_by_isin("DE0007664039") is vz
+
+    @pytest.mark.asyncio
+    async def test_snapshot_updates_live_instrument(self, local_api: PyOnVista, onvista_server):
+        (etf,) = await local_api.search_instrument("IUSA")
+        assert etf.quote is None and etf.type == "FUND"
+        # the live instrument knows its type, so the fund snapshot is requested
+        assert await local_api.request_instrument(isin="IE00B42NKQ00") is etf
+        assert onvista_server.hits["/api/v1/funds/ISIN:IE00B42NKQ00/snapshot"] == 1
+        assert etf.quote is not None and etf.dict
+        (found,) = await local_api.search_instrument("IUSA")
+        assert found is etf and found.quote is etf.quote
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests(self, local_api: PyOnVista):
+        first, second = await asyncio.gather(
+            local_api.request_instrument(isin="DE0007664039"),
+            local_api.request_instrument(isin="DE0007664039"),
+        )
+        assert first is second
+
+    @pytest.mark.asyncio
+    async def test_entries_are_weak(self, local_api: PyOnVista):
+        await local_api.search_instrument("Volkswagen")
+        gc.collect()
+        (vz,) = await local_api.search_instrument("VOW3")
+        assert vz.quote is None and len(local_api._instruments) == 2
+
+    def test_from_json_keys(self):
+        identity_map = weakref.WeakValueDictionary()
+        entry = load_asset("search_vw.json")["facets"][0]["results"][0]
+        first = Instrument.from_json(entry, identity_map)
+        assert Instrument.from_json(dict(entry, isin=entry["isin"].lower()), identity_map) is first
+        assert Instrument.from_json(dict(entry, isin=None), identity_map) is first
+        assert set(identity_map) == {entry["isin"], entry["entityValue"]}
+        assert Instrument.from_json(entry) is not first
+
+
+def search_requests(onvista_server) -> int:
+    return sum(hits for path, hits in onvista_server.hits.items() if "search/facet" in path)
+
+
+class TestSearchInstrument:
+    @pytest.fixture()
+    def constructed(self, monkeypatch) -> list:
+        """isins of all instruments constructed by Instrument.from_json"""
+        isins = []
+        from_json = Instrument.from_json.__func__
+
+        def counting(cls, data, identity_map=None):
+            isins.append(data.get("isin"))
+            return from_json(cls, data, identity_map)
+
+        monkeypatch.setattr(Instrument, "from_json", classmethod(counting))
+        return isins
+
+    @pytest.mark.asyncio
+    async def test_type_selects_facet(self, local_api: PyOnVista, constructed):
+        results = await local_api.search_instrument("e", instrument_type="fund")
+        assert [i.isin for i in results] == ["IE00B42NKQ00"]
+        assert constructed == ["IE00B42NKQ00"]
+
+    @pytest.mark.asyncio
+    async def test_country_filters_before_construction(self, local_api: PyOnVista, constructed):
+        results = await local_api.search_instrument("e", country="ie")
+        assert [i.isin for i in results] == ["IE00B42NKQ00"]
+        assert constructed == ["IE00B42NKQ00"]
+
+    @pytest.mark.asyncio
+    async def test_stops_at_limit(self, local_api: PyOnVista, onvista_server, constructed):
+        results = await local_api.search_instrument("Volkswagen", limit=1)
+        assert len(results) == 1 and len(constructed) == 1
+        assert search_queries(onvista_server)[0]["perType"] == ["1"]
+
+    @pytest.mark.asyncio
+    async def test_country_requests_full_facets(self, local_api: PyOnVista, onvista_server):
+        await local_api.search_instrument("Volkswagen", country="DE", limit=1)
+        assert search_queries(onvista_server)[0]["perType"] == ["100"]
+
+
+class TestSearchCache:
+    @pytest.fixture()
+    def clock(self) -> FakeClock:
+        return FakeClock()
+
+    @pytest.fixture()
+    async def api(self, onvista_server, aio_client, clock) -> PyOnVista:
+        api = PyOnVista(request_delay=0, api_base=onvista_server.api_base,
+                        search_cache=SearchCache(ttl=60, clock=clock))
+        await api.install_client(aio_client)
+        return api
+
+    def test_key_is_normalized(self):
+        assert search_key("  Volkswagen   Vz ", "stock", "de") == ("volkswagen vz", "STOCK", "DE")
+        assert search_key("VW") == ("vw", None, None)
+
+    @pytest.mark.asyncio
+    async def test_repeated_search(self, api: PyOnVista, onvista_server, clock):
+        first = await api.search_instrument("Volkswagen", instrument_type="STOCK")
+        second = await api.search_instrument(" volkswagen ", instrument_type="stock")
+        assert [i.isin for i in second] == [i.isin for i in first]
+        assert search_requests(onvista_server) == 1
+        assert api.cache_stats()["search"].hit_ratio == 0.5
+
+        clock.now += 60
+        await api.search_instrument("Volkswagen", instrument_type="STOCK")
+        assert search_requests(onvista_server) == 2
+        assert api.search_cache.stats.expirations == 1
+
+    @pytest.mark.asyncio
+    async def test_prefix_reuse(self, api: PyOnVista, onvista_server):
+        await api.search_instrument("Volks")
+        assert {i.isin for i in await api.search_instrument("Volkswagen")} == {"DE0007664039", "DE0007664005"}
+        assert [i.isin for i in await api.search_instrument("VOLKSWAGEN (VW) VZ")] == ["DE0007664039"]
+        assert await api.search_instrument("Volksbank") == []
+        assert search_requests(onvista_server) == 1
+        assert api.search_cache.prefix_hits == 3
+
+    @pytest.mark.asyncio
+    async def test_prefix_reuse_matches_tokens(self, api: PyOnVista, onvista_server):
+        await api.search_instrument("Volks")
+        assert [i.isin for i in await api.search_instrument("Volkswagen Vz")] == ["DE0007664039"]
+        assert [i.isin for i in await api.search_instrument("volks vow3")] == ["DE0007664039"]
+        assert await api.search_instrument("Volkswagen Ucits") == []
+        assert search_requests(onvista_server) == 1
+
+    @pytest.mark.asyncio
+    async def test_truncated_facets_are_not_reused(self, api: PyOnVista, onvista_server):
+        await api.search_instrument("Volks", limit=1)
+        assert len(await api.search_instrument("Volks", limit=1)) == 1
+        assert search_requests(onvista_server) == 1
+        # the cached response holds one of two results
+        assert len(await api.search_instrument("Volks", limit=2)) == 2
+        assert search_requests(onvista_server) == 2
+
+        await api.search_instrument("VOW", limit=1)
+        await api.search_instrument("VOW3")
+        assert search_requests(onvista_server) == 4
+
+    @pytest.mark.asyncio
+    async def test_filters_are_part_of_the_key(self, api: PyOnVista, onvista_server):
+        await api.search_instrument("Volkswagen", instrument_type="FUND")
+        assert len(await api.search_instrument("Volkswagen")) == 2
+        assert search_requests(onvista_server) == 2
+
+    def test_lru_eviction(self):
+        cache = SearchCache(max_entries=2, clock=FakeClock())
+        for term in ("a", "b"):
+            cache.set(term, None, None, [], complete=False)
+        assert cache.get("a", limit=0) == []
+        cache.set("c", None, None, [], complete=False)
+        assert len(cache) == 2 and cache.stats.evictions == 1
+        assert cache.get("b", limit=0) is None
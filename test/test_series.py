@@ -0,0 +1,135 @@
+import datetime
+import math
+
+import pytest
+
+from src.pyonvista.api import PyOnVista, Quote
+from src.pyonvista.series import QuoteSeries
+
+BARS = [
+    (datetime.datetime(2024, 5, 6, 9, 0).timestamp(), 10.0, 11.0, 9.0, 10.5, 1000, 10),
+    (datetime.datetime(2024, 5, 6, 9, 15).timestamp(), 10.5, 12.0, 10.0, 11.5, 2000, 20),
+    (datetime.datetime(2024, 5, 6, 9, 30).timestamp(), 11.5, 11.8, 11.0, 11.2, 1500, 15),
+]
+
+
+class TestQuoteSeries:
+    def test_columns(self):
+        series = QuoteSeries("15m", bars=BARS)
+        assert len(series) == 3
+        assert list(series.close) == [10.5, 11.5, 11.2]
+        assert series.columns["volume"].tolist() == [1000, 2000, 1500]
+        assert series.nbytes == 3 * 7 * 8
+        assert series.last_timestamp == datetime.datetime(2024, 5, 6, 9, 30)
+
+    def test_row_views(self, instrument_vw):
+        series = QuoteSeries("15m", instrument_vw, bars=BARS)
+        quote = series[1]
+        assert isinstance(quote, Quote)
+        assert quote.timestamp == datetime.datetime(2024, 5, 6, 9, 15)
+        assert (quote.open, quote.high, quote.low, quote.close) == (10.5, 12.0, 10.0, 11.5)
+        assert (quote.volume, quote.pieces) == (2000, 20)
+        assert quote.instrument is instrument_vw
+        assert series[-1].close == 11.2
+        with pytest.raises(IndexError):
+            series[3]
+
+    def test_slice_and_iter(self):
+        series = QuoteSeries("15m", bars=BARS)
+        head = series[:2]
+        assert isinstance(head, QuoteSeries)
+        assert list(head.close) == [10.5, 11.5]
+        assert [q.close for q in series] == [10.5, 11.5, 11.2]
+        assert not QuoteSeries("15m")
+
+    def test_missing_values(self):
+        series = QuoteSeries("15m", bars=BARS[:1])
+        series.append((BARS[1][0], 10.5, 12.0, 10.0, 11.5, None, None))
+        assert all(len(column) == 2 for column in series.columns.values())
+        assert (series[1].volume, series[1].pieces) == (None, None)
+        assert math.isnan(series.volume[1])
+
+    def test_invalid_bar_leaves_series_unchanged(self):
+        series = QuoteSeries("15m", bars=BARS[:1])
+        with pytest.raises(ValueError):
+            series.append((BARS[1][0], 10.5, 12.0, 10.0, 11.5, "n/a", 20))
+        with pytest.raises(ValueError):
+            series.append(BARS[1][:5])
+        assert all(len(column) == 1 for column in series.columns.values())
+
+    def test_to_numpy(self):
+        numpy = pytest.importorskip("numpy")
+        series = QuoteSeries("15m", bars=BARS)
+        columns = series.to_numpy()
+        assert isinstance(columns["close"], numpy.ndarray)
+        assert columns["close"].mean() == pytest.approx(11.066666, rel=1e-5)
+        # copies do not pin the columns
+        series.append((BARS[2][0] + 900, 11.2, 11.5, 11.0, 11.4, 900, 9))
+        assert len(columns["close"]) == 3 and len(series.to_numpy()["close"]) == 4
+
+    def test_to_numpy_views(self):
+        pytest.importorskip("numpy")
+        series = QuoteSeries("15m", bars=BARS)
+        views = series.to_numpy(copy=False)
+        series.close[0] = 9.0
+        assert views["close"][0] == 9.0
+        with pytest.raises(BufferError):
+            series.merge_tail([(BARS[2][0] + 900, 11.2, 11.5, 11.0, 11.4, 900, 9)])
+        del views
+        series.merge_tail([(BARS[2][0] + 900, 11.2, 11.5, 11.0, 11.4, 900, 9)])
+        assert len(series) == 4
+
+
+class TestRequestQuoteSeries:
+    @pytest.mark.asyncio
+    async def test_matches_request_quotes(self, local_api: PyOnVista, instrument_vw):
+        start, end = datetime.datetime(2024, 5, 6), datetime.datetime(2024, 5, 10)
+        quotes = await local_api.request_quotes(instrument_vw, start, end)
+        series = await local_api.request_quote_series(instrument_vw, start, end)
+        assert len(series) == len(quotes) == 5 * 34
+        assert series.notation is instrument_vw.notations[0]
+        assert series.resolution == "15m"
+        assert [q.timestamp for q in series] == [q.timestamp for q in quotes]
+        assert list(series.close) == [q.close for q in quotes]
+
+
+class TestUpdateQuotes:
+    @pytest.mark.asyncio
+    async def test_requests_from_last_bar(self, local_api: PyOnVista, onvista_server, instrument_vw):
+        series = await local_api.request_quote_series(
+            instrument_vw, datetime.datetime(2024, 5, 6), datetime.datetime(2024, 5, 8))
+        assert len(series) == 3 * 34
+        expected_close = series.close[-1]
+        series.close[-1] = 0.0
+
+        appended = await local_api.update_quotes(series, end=datetime.datetime(2024, 5, 10))
+        assert appended == 2 * 34 and len(series) == 5 * 34
+        # the revised final bar is corrected
+        assert series.close[3 * 34 - 1] == expected_close
+        reference = await local_api.request_quote_series(
+            instrument_vw, datetime.datetime(2024, 5, 6), datetime.datetime(2024, 5, 10))
+        assert list(series.timestamp) == list(reference.timestamp)
+        assert list(series.close) == list(reference.close)
+
+        requests = [path for path in onvista_server.hits if "chart_history" in path]
+        assert any("startDate=2024-05-08" in path and "endDate=2024-05-10" in path for path in requests)
+
+    @pytest.mark.asyncio
+    async def test_no_new_bars(self, local_api: PyOnVista, instrument_vw):
+        end = datetime.datetime(2024, 5, 8)
+        series = await local_api.request_quote_series(instrument_vw, datetime.datetime(2024, 5, 6), end)
+        assert await local_api.update_quotes(series, end=end) == 0
+        assert len(series) == 3 * 34
+
+    @pytest.mark.asyncio
+    async def test_requires_instrument(self, local_api: PyOnVista):
+        with pytest.raises(ValueError):
+            await local_api.update_quotes(QuoteSeries("15m"))
+
+    def test_merge_tail(self):
+        series = QuoteSeries("15m", bars=BARS[:2])
+        revised = (BARS[1][0], 10.5, 12.5, 10.0, 12.0, 2500, 25)
+        assert series.merge_tail([BARS[0], revised, BARS[2]]) == 1
+        assert list(series.close) == [10.5, 12.0, 11.2]
+        assert list(series.volume) == [1000, 2500, 1500]
+        assert QuoteSeries("15m").merge_tail(BARS) == 3
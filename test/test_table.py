@@ -0,0 +1,59 @@
+import array
+import dataclasses
+import math
+
+import pytest
+
+from src.pyonvista.api import FIELD_MAP, CompanyInfo, FinancialRatios
+from src.pyonvista.table import FundamentalsTable
+
+EXTRACTORS = ("get_financial_ratios", "get_performance_metrics", "get_technical_indicators",
+              "get_company_info", "get_sustainability_data")
+
+
+class TestFundamentalsTable:
+    def test_columns(self, instrument_vw, instrument_etf):
+        table = FundamentalsTable.from_instruments([instrument_vw, instrument_etf])
+        assert len(table) == 2
+        assert table["isin"] == ["DE0007664039", "IE00B42NKQ00"]
+        names = {field.name for cls in FIELD_MAP for field in dataclasses.fields(cls)}
+        assert set(table.columns) == names | {"isin", "symbol", "name"}
+        assert isinstance(table["pe_ratio"], array.array)
+        assert table["pe_ratio"][0] == 3.91 and math.isnan(table["pe_ratio"][1])
+        assert table["country"] == ["DE", None]
+
+    def test_columns_match_get_methods(self, instrument_vw, instrument_etf):
+        table = FundamentalsTable.from_instruments([instrument_vw, instrument_etf])
+        for row, instrument in enumerate([instrument_vw, instrument_etf]):
+            fundamentals = {}
+            for extractor in EXTRACTORS:
+                fundamentals.update(dataclasses.asdict(getattr(instrument, extractor)()))
+            assert set(table.columns) - {"isin", "symbol", "name"} == set(fundamentals)
+            for name, expected in fundamentals.items():
+                value = table[name][row]
+                assert value == expected or (expected is None and math.isnan(value))
+        assert isinstance(table["beta"], array.array) and table["founded"] == [None, None]
+
+    def test_rows_match_get_methods(self, instrument_vw):
+        table = FundamentalsTable.from_instruments([instrument_vw])
+        ratios = instrument_vw.get_financial_ratios()
+        for field in FIELD_MAP[FinancialRatios]:
+            expected = getattr(ratios, field.name)
+            value = table[field.name][0]
+            assert value == expected or (expected is None and math.isnan(value))
+
+    def test_classes(self, instrument_vw):
+        table = FundamentalsTable.from_instruments([instrument_vw], classes=[CompanyInfo])
+        assert set(table.columns) == {"isin", "symbol", "name"} | {
+            field.name for field in dataclasses.fields(CompanyInfo)}
+
+    def test_pandas(self, instrument_vw, instrument_etf):
+        pytest.importorskip("pandas")
+        frame = FundamentalsTable.from_instruments([instrument_vw, instrument_etf]).to_pandas()
+        assert frame.loc["DE0007664039", "pe_ratio"] == 3.91
+        assert frame["pe_ratio"].isna().sum() == 1
+
+    def test_arrow(self, instrument_vw, instrument_etf):
+        pytest.importorskip("pyarrow")
+        table = FundamentalsTable.from_instruments([instrument_vw, instrument_etf]).to_arrow()
+        assert table.column("pe_ratio").to_pylist() == [3.91, None]
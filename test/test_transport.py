@@ -0,0 +1,233 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from src.pyonvista.api import PyOnVista, Instrument
+from src.pyonvista.decoder import DECODERS, get_decoder, decoder_name
+from src.pyonvista.transport import Transport, RateLimiter, TokenBucket, create_connector, create_session
+
+from conftest import FakeClock
+
+
+class TestRateLimiter:
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_are_spaced(self):
+        limiter = RateLimiter(0.05)
+        stamps = []
+
+        async def call():
+            await limiter.acquire()
+            stamps.append(time.monotonic())
+
+        await asyncio.gather(*(call() for _ in range(4)))
+        stamps.sort()
+        gaps = [b - a for a, b in zip(stamps, stamps[1:])]
+        assert all(gap >= 0.04 for gap in gaps)
+
+    @pytest.mark.asyncio
+    async def test_zero_interval_does_not_sleep(self):
+        limiter = RateLimiter(0)
+        start = time.monotonic()
+        for _ in range(100):
+            await limiter.acquire()
+        assert time.monotonic() - start < 0.05
+
+
+class TestTokenBucket:
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError):
+            TokenBucket(rate=0)
+        with pytest.raises(ValueError):
+            TokenBucket(rate=1, capacity=0.5)
+
+    @pytest.mark.asyncio
+    async def test_burst_passes_without_waiting(self):
+        clock = FakeClock(0.0)
+        bucket = TokenBucket(rate=1, capacity=5, clock=clock)
+        for _ in range(5):
+            await bucket.acquire()
+        assert bucket.fill_level == 0
+        assert bucket.stats.acquired == 5
+        assert bucket.stats.delayed == 0
+        assert bucket.wait_time == pytest.approx(1.0)
+
+    def test_refill_is_capped(self):
+        clock = FakeClock(0.0)
+        bucket = TokenBucket(rate=2, capacity=3, clock=clock)
+        bucket._tokens = 0
+        clock.now = 1.0
+        assert bucket.fill_level == pytest.approx(2.0)
+        clock.now = 10.0
+        assert bucket.fill_level == pytest.approx(3.0)
+
+    @pytest.mark.asyncio
+    async def test_waiting_callers_reserve_in_order(self):
+        bucket = TokenBucket(rate=50, capacity=2)
+        await asyncio.gather(*(bucket.acquire() for _ in range(6)))
+        assert bucket.stats.acquired == 6
+        assert bucket.stats.delayed == 4
+        assert bucket.stats.max_wait == pytest.approx(4 / 50, abs=0.01)
+        assert bucket.stats.mean_wait > 0
+
+    def test_penalize_drains_bucket(self):
+        clock = FakeClock(0.0)
+        bucket = TokenBucket(rate=10, capacity=10, clock=clock)
+        bucket.penalize(1.0)
+        assert bucket.fill_level == 0
+        assert bucket.wait_time == pytest.approx(1.1)
+
+    @pytest.mark.asyncio
+    async def test_shared_between_clients(self, onvista_server, aio_client):
+        bucket = TokenBucket(rate=1000, capacity=4)
+        apis = [PyOnVista(api_base=onvista_server.api_base, rate_limiter=bucket) for _ in range(2)]
+        for api in apis:
+            await api.install_client(aio_client)
+            assert api.rate_limiter is bucket
+        isins = [onvista_server.add_snapshot(f"DE000000000{i}") for i in range(6)]
+        await asyncio.gather(*(apis[i % 2].request_instrument(isin=isin) for i, isin in enumerate(isins)))
+        assert bucket.stats.acquired == 6
+
+
+class TestTransport:
+    def test_invalid_max_in_flight(self):
+        with pytest.raises(ValueError):
+            Transport(client=None, max_in_flight=0)
+
+    @pytest.mark.asyncio
+    async def test_tuned_session(self):
+        connector = create_connector(limit_per_host=7, ttl_dns_cache=60)
+        async with create_session(connector) as session:
+            assert session.connector is connector
+            assert connector.limit_per_host == 7
+
+    @pytest.mark.asyncio
+    async def test_requests_overlap(self, local_api: PyOnVista, onvista_server):
+        onvista_server.delay = 0.1
+        isins = [onvista_server.add_snapshot(f"DE000000000{i}") for i in range(6)]
+        start = time.monotonic()
+        instruments = await asyncio.gather(*(local_api.request_instrument(isin=isin) for isin in isins))
+        elapsed = time.monotonic() - start
+        assert [i.isin for i in instruments] == isins
+        assert onvista_server.peak_in_flight > 1
+        assert elapsed < 0.1 * len(isins)
+
+    @pytest.mark.asyncio
+    async def test_max_in_flight_is_respected(self, onvista_server, aio_client):
+        api = PyOnVista(request_delay=0, max_in_flight=2, api_base=onvista_server.api_base)
+        await api.install_client(aio_client)
+        onvista_server.delay = 0.02
+        isins = [onvista_server.add_snapshot(f"DE000000000{i}") for i in range(6)]
+        await asyncio.gather(*(api.request_instrument(isin=isin) for isin in isins))
+        assert onvista_server.peak_in_flight <= 2
+        assert api._transport.peak_in_flight <= 2
+
+    @pytest.mark.asyncio
+    async def test_http_error_returns_none(self, local_api: PyOnVista, onvista_server):
+        url = onvista_server.make_url("/api/v1/stocks/ISIN:XX0000000000/snapshot")
+        assert await local_api._get_json(str(url)) is None
+
+    @pytest.mark.asyncio
+    async def test_rate_limited_retry_is_bounded(self, local_api: PyOnVista, onvista_server):
+        path = "/api/v1/stocks/ISIN:DE0007664039/snapshot"
+        onvista_server.status[path] = 429
+        local_api._transport.retry_delay = 0
+        assert await local_api._get_json(str(onvista_server.make_url(path))) is None
+        assert onvista_server.hits[path] == local_api._transport.max_retries + 1
+
+    @pytest.mark.asyncio
+    async def test_rate_limited_penalizes_limiter(self, onvista_server, aio_client):
+        path = "/api/v1/stocks/ISIN:DE0007664039/snapshot"
+        onvista_server.status[path] = 429
+        bucket = TokenBucket(rate=1000, capacity=1)
+        api = PyOnVista(api_base=onvista_server.api_base, rate_limiter=bucket)
+        await api.install_client(aio_client)
+        api._transport.retry_delay = 0.05
+        start = time.monotonic()
+        assert await api._get_json(str(onvista_server.make_url(path))) is None
+        assert time.monotonic() - start >= 0.05
+        assert bucket.stats.delayed == 1
+
+    @pytest.mark.asyncio
+    async def test_context_manager_owns_session(self, onvista_server):
+        async with PyOnVista(request_delay=0, api_base=onvista_server.api_base) as api:
+            session = api._client
+            instrument = await api.request_instrument(isin="DE0007664039")
+        assert isinstance(instrument, Instrument)
+        assert session.closed
+        assert api._client is None
+
+    @pytest.mark.asyncio
+    async def test_requires_client(self):
+        with pytest.raises(RuntimeError):
+            await PyOnVista()._get_json("http://localhost")
+
+
+class TestCoalescing:
+    @pytest.mark.asyncio
+    async def test_identical_requests_share_one_call(self, local_api: PyOnVista, onvista_server):
+        onvista_server.delay = 0.05
+        instruments = await asyncio.gather(*(local_api.request_instrument(isin="DE0007664039") for _ in range(5)))
+        assert onvista_server.hits["/api/v1/stocks/ISIN:DE0007664039/snapshot"] == 1
+        assert local_api.coalesced_requests == 4
+        # one live instrument per isin
+        assert len({id(i) for i in instruments}) == 1
+        assert all(i.name == "Volkswagen (VW) Vz" for i in instruments)
+
+    @pytest.mark.asyncio
+    async def test_sequential_requests_are_not_coalesced(self, local_api: PyOnVista, onvista_server):
+        await local_api.request_instrument(isin="DE0007664039")
+        await local_api.request_instrument(isin="DE0007664039")
+        assert onvista_server.hits["/api/v1/stocks/ISIN:DE0007664039/snapshot"] == 2
+        assert local_api.coalesced_requests == 0
+        assert not local_api._pending
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_others(self, local_api: PyOnVista, onvista_server):
+        onvista_server.delay = 0.05
+        url = str(onvista_server.make_url("/api/v1/stocks/ISIN:DE0007664039/snapshot"))
+        first = asyncio.ensure_future(local_api._get_json(url))
+        second = asyncio.ensure_future(local_api._get_json(url))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert (await second)["instrument"]["isin"] == "DE0007664039"
+        assert first.cancelled()
+
+
+class TestDecoder:
+    def test_fallback_and_names(self):
+        assert get_decoder("json") is json.loads
+        assert decoder_name(get_decoder()) in DECODERS
+        with pytest.raises(ValueError):
+            get_decoder("yaml")
+
+    def test_prefers_orjson(self):
+        pytest.importorskip("orjson")
+        assert decoder_name(get_decoder()) == "orjson"
+
+    @pytest.mark.asyncio
+    async def test_custom_decoder(self, onvista_server, aio_client):
+        calls = []
+
+        def decode(body: bytes):
+            calls.append(len(body))
+            return json.loads(body)
+
+        api = PyOnVista(request_delay=0, api_base=onvista_server.api_base, decoder=decode)
+        await api.install_client(aio_client)
+        instrument = await api.request_instrument(isin="DE0007664039")
+        assert instrument.name == "Volkswagen (VW) Vz"
+        assert calls and calls[0] > 0
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("name", sorted(DECODERS))
+    async def test_decoders_agree(self, name, onvista_server, aio_client):
+        api = PyOnVista(request_delay=0, api_base=onvista_server.api_base, decoder=name)
+        await api.install_client(aio_client)
+        instrument = await api.request_instrument(isin="DE0007664039")
+        assert instrument.get_financial_ratios().pe_ratio == 3.91
+
+    def test_invalid_decoder_fails_early(self):
+        with pytest.raises(ValueError):
+            PyOnVista(decoder="yaml")